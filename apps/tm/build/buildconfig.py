@@ -7,6 +7,7 @@ buildconfig - configuration for building textmetrics source data
 import os
 
 from lex import lexconfig
+from apps.tm.lib import appsettings
 
 PIPELINE = (
     ('make_leanht', 0),
@@ -15,8 +16,12 @@ PIPELINE = (
     ('index_proper', 0),
     ('index_forms', 1),
     ('refine_forms', 1),
+    ('index_alternates', 1),
     ('populate_lexicon_db', 1),
+    ('compile_lexicon', 1),
     ('prepare_canned_texts', 1),
+    ('record_lexicon_build', 1),
+    ('refresh_user_submissions', 1),
 )
 
 
@@ -29,6 +34,17 @@ LEANHT_DIR = os.path.join(BASE_DIR, 'leanht')
 
 EPONYMS_FILE = os.path.join(BASE_DIR, 'oed_eponyms.txt')
 
+# Compiled lexicon file (written where the app will look for it)
+LEXICON_FILE = appsettings.LEXICON_FILE
+LEXICON_FILTER_FILE = appsettings.LEXICON_FILTER_FILE
+LEXICON_COMPOUNDS_FILE = appsettings.LEXICON_COMPOUNDS_FILE
+# Target false-positive rate for the lexicon filter
+LEXICON_FILTER_ERROR_RATE = 0.01
+
+# Number of worker processes used to analyse long documents (see
+#  lib/analysispool.py)
+ANALYSIS_WORKERS = os.cpu_count() or 1
+
 ENTRY_MINIMUM_END_DATE = 1750
 VARIANT_MINIMUM_END_DATE = 1650
 MAX_WORDLENGTH = 40
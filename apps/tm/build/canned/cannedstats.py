@@ -3,6 +3,7 @@ from collections import defaultdict
 from django.core.management.base import BaseCommand
 import numpy
 
+from apps.tm.build import buildconfig
 from apps.tm.build.canned.cannedloader import CannedLoader
 from apps.tm.lib.textmanager import TextManager
 
@@ -16,7 +17,8 @@ class Command(BaseCommand):
         canned_loader = CannedLoader()
         for doc in canned_loader.iterate():
             # Process this document
-            tm = TextManager(doc.text, doc.year)
+            tm = TextManager(doc.text, doc.year,
+                             workers=buildconfig.ANALYSIS_WORKERS)
             # Trace progress message
             self.stdout.write(doc.title + ' ' + doc.author)
             for key, value in sorted(tm.profile_stats().items()):
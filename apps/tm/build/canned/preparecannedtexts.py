@@ -5,6 +5,7 @@ Populate the Document database table with canned documents
 from sys import stdout
 import random
 
+from apps.tm.build import buildconfig
 from apps.tm.build.canned.cannedloader import CannedLoader
 from apps.tm.models import Document
 from apps.tm.lib.textmanager import TextManager
@@ -21,7 +22,8 @@ def prepare_canned_texts():
     canned_loader = CannedLoader()
     for doc in canned_loader.iterate():
         # Process this document
-        tm = TextManager(doc.text, doc.year)
+        tm = TextManager(doc.text, doc.year,
+                         workers=buildconfig.ANALYSIS_WORKERS)
         # Trace progress message
         stdout.write('%s, %s\n' % (doc.author, doc.title))
 
@@ -4,7 +4,8 @@ import re
 
 from lex.oed.thesaurus.contentiterator import ContentIterator
 from lex.oed.thesaurus.taxonomymanager import TaxonomyManager
-from apps.tm.htmodels import ThesaurusInstance, ThesaurusClass
+from apps.tm.htmodels import (ThesaurusInstance, ThesaurusClass,
+                              make_breadcrumb, PATH_SEPARATOR)
 from apps.tm.build import buildconfig
 
 IN_DIR = os.path.join(buildconfig.LEANHT_DIR, 'inflected')
@@ -22,6 +23,11 @@ def store_taxonomy():
     valid_ids = {thesclass.id(): thesclass.size()
                  for thesclass in ci.iterate()}
 
+    # Since classes are stored level by level, each class's parent has
+    #  always been processed already; so we can build up each class's
+    #  materialized path and breadcrumb from its parent's.
+    lineages = {}
+
     tree_manager = TaxonomyManager(lazy=True, verbosity=None)
     for level in range(1, 20):
         classes = [c for c in tree_manager.classes if c.level() == level
@@ -41,6 +47,11 @@ def store_taxonomy():
                                     parent_id=thesclass.parent(),
                                     node_size=revised_size,
                                     branch_size=thesclass.size(branch=True))
+            lineage = lineages.get(thesclass.parent(), []) + [record, ]
+            lineages[thesclass.id()] = lineage
+            record.path = ''.join(['%d%s' % (c.id, PATH_SEPARATOR)
+                                   for c in lineage])
+            record.breadcrumb_text = make_breadcrumb(lineage)
             records.append(record)
             if len(records) > 1000:
                 ThesaurusClass.objects.bulk_create(records)
@@ -0,0 +1,50 @@
+"""
+Build the alternate-key index: a mapping of variant sorts (archaic
+spellings, plurals, elided forms, etc.) to the sorts of known wordforms
+which lemma_lookup()'s fallback rewrites may convert them to.
+
+This means that at lookup time, an unknown form needs only a single
+probe of the index to find out which (if any) of the rewrites are worth
+trying, rather than a query for every rewrite.
+"""
+
+import os
+from collections import defaultdict
+from sys import stdout
+
+from apps.tm.build import buildconfig
+from apps.tm.lib.lemmalookup import alternate_keys
+from .populatedb import iterate_lexicon, typeunits
+
+FORM_INDEX_DIR = buildconfig.FORM_INDEX_DIR
+MAX_WORDLENGTH = buildconfig.MAX_WORDLENGTH
+
+
+def index_alternate_keys():
+    """
+    Write the alternate-key index, based on the refined lexicon data
+    (as output by refine_index())
+    """
+    stdout.write('Collecting wordform sorts...\n')
+    sorts = set()
+    for row in iterate_lexicon():
+        for typeunit in typeunits(row.block):
+            sorts.add(typeunit[0])
+
+    stdout.write('Generating alternate keys...\n')
+    alternates = defaultdict(set)
+    for sort in sorts:
+        for variant in alternate_keys(sort):
+            # Variants which are themselves known sorts will never get
+            #  as far as the fallback rewrites, so can be skipped
+            if (variant and
+                    variant not in sorts and
+                    len(variant) <= MAX_WORDLENGTH):
+                alternates[variant].add(sort)
+
+    out_dir = os.path.join(FORM_INDEX_DIR, 'alternates')
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'all.txt'), 'w') as filehandle:
+        for variant in sorted(alternates):
+            for target in sorted(alternates[variant]):
+                filehandle.write('%s\t%s\n' % (variant, target))
@@ -0,0 +1,36 @@
+"""
+Build the compound index: the sort of every multiword and hyphenated
+wordform, keyed by the sort of its first word (see lib/compoundindex.py).
+"""
+
+import os
+from sys import stdout
+
+from apps.tm.build import buildconfig
+from apps.tm.lib.compoundindex import first_word_sort
+from .populatedb import iterate_lexicon, typeunits
+
+
+def compile_compound_index():
+    """
+    Write the compound index, using the same data as populate_db()
+    """
+    stdout.write('Collecting multiword and hyphenated wordforms...\n')
+    compounds = set()
+    for row in iterate_lexicon():
+        for typeunit in typeunits(row.block):
+            first = first_word_sort(typeunit[1])
+            if first is not None:
+                compounds.add((first, typeunit[0]))
+
+    out_file = buildconfig.LEXICON_COMPOUNDS_FILE
+    stdout.write('Writing %s (%d wordforms)...\n' % (out_file,
+                                                     len(compounds)))
+    # Write to a temporary file, then move it into place (see
+    #  compilelexicon.py)
+    tmp_file = out_file + '.tmp'
+    os.makedirs(os.path.dirname(out_file), exist_ok=True)
+    with open(tmp_file, 'w') as filehandle:
+        for first, sort in sorted(compounds):
+            filehandle.write('%s\t%s\n' % (first, sort))
+    os.replace(tmp_file, out_file)
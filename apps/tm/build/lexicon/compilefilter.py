@@ -0,0 +1,33 @@
+"""
+Build the lexicon filter: a Bloom filter of every wordform sort and
+alternate key, used to skip lookups for forms which are definitely not
+in the lexicon (see lib/lexiconfilter.py).
+"""
+
+from sys import stdout
+
+from apps.tm.build import buildconfig
+from apps.tm.lib.lexiconfilter import BloomFilter
+from .populatedb import iterate_lexicon, iterate_alternate_keys, typeunits
+
+
+def compile_lexicon_filter():
+    """
+    Write the lexicon filter, using the same data as populate_db()
+    """
+    stdout.write('Collecting wordform sorts and alternate keys...\n')
+    sorts = set()
+    for row in iterate_lexicon():
+        for typeunit in typeunits(row.block):
+            sorts.add(typeunit[0])
+    for variant, _ in iterate_alternate_keys():
+        sorts.add(variant)
+
+    bloom_filter = BloomFilter.for_capacity(
+        len(sorts), buildconfig.LEXICON_FILTER_ERROR_RATE)
+    for sort in sorts:
+        bloom_filter.add(sort)
+
+    stdout.write('Writing %s (%d keys, %d bits)...\n' % (
+        buildconfig.LEXICON_FILTER_FILE, len(sorts), bloom_filter.num_bits))
+    bloom_filter.save(buildconfig.LEXICON_FILTER_FILE)
@@ -0,0 +1,189 @@
+"""
+Compile the refined lexicon data into a single immutable binary file,
+which can be memory-mapped by the runtime lookup (see lib/lexiconfile.py
+for the file layout).
+"""
+
+import os
+import json
+from collections import defaultdict
+from sys import stdout
+
+from apps.tm.build import buildconfig
+from apps.tm.lib.lexiconfile import (MAGIC, HEADER_LENGTH, KEY_RECORD,
+                                     STRING_RECORD, WORDFORM_RECORD,
+                                     LEMMA_RECORD, NULL_INT)
+from .populatedb import (iterate_lexicon, iterate_alternate_keys,
+                         language_table, typeunits, rounder)
+
+
+def compile_lexicon_file():
+    """
+    Write the lexicon file, using the same data (and the same lemma and
+    definition IDs) as populate_db()
+    """
+    strings = _StringPool()
+    wordclasses = _CodeTable()
+    lemma_records = []
+    headwords = {}
+    wordforms = defaultdict(list)
+
+    stdout.write('Compiling lemma and wordform records...\n')
+    for row in iterate_lexicon():
+        block = row.block
+        lemma_index = len(lemma_records)
+        lemma_records.append(LEMMA_RECORD.pack(
+            row.lemma_id,
+            *(strings.add(block.lemma) + strings.add(block.sort) +
+              (wordclasses.code(block.wordclass),
+               _signed(block.start),
+               _signed(block.end),
+               block.refentry,
+               block.refid or 0,
+               row.language_id or 0,
+               row.definition_id or 0,
+               block.htlink or 0,
+               rounder(block.f2000),
+               rounder(block.f1950),
+               rounder(block.f1900),
+               rounder(block.f1850),
+               rounder(block.f1800),
+               rounder(block.f1750)))))
+
+        # For each headword, keep only the most frequent lemma
+        f2000 = rounder(block.f2000)
+        if block.lemma not in headwords or f2000 > headwords[block.lemma][0]:
+            headwords[block.lemma] = (f2000, lemma_index)
+
+        for typeunit in typeunits(block):
+            wordforms[typeunit[0]].append((rounder(typeunit[4]),
+                                           typeunit,
+                                           lemma_index))
+
+    stdout.write('Compiling key tables...\n')
+    keys = []
+    wordform_records = []
+    for sort in sorted(wordforms, key=lambda k: k.encode('utf8')):
+        # Highest-frequency first (the same as the default ordering
+        #  of the Wordform model)
+        group = sorted(wordforms[sort], key=lambda w: w[0], reverse=True)
+        keys.append(KEY_RECORD.pack(*(strings.add(sort) +
+                                      (len(wordform_records), len(group)))))
+        for f2000, typeunit, lemma_index in group:
+            wordform_records.append(WORDFORM_RECORD.pack(
+                *(strings.add(typeunit[1]) +
+                  (wordclasses.code(typeunit[2]),
+                   lemma_index,
+                   f2000,
+                   rounder(typeunit[5]),
+                   rounder(typeunit[6])))))
+
+    headword_records = []
+    for headword in sorted(headwords, key=lambda k: k.encode('utf8')):
+        headword_records.append(KEY_RECORD.pack(
+            *(strings.add(headword) + (headwords[headword][1], 1))))
+
+    stdout.write('Compiling alternate keys...\n')
+    alternates = defaultdict(list)
+    for variant, target in iterate_alternate_keys():
+        alternates[variant].append(target)
+    alternate_records = []
+    target_records = []
+    for variant in sorted(alternates, key=lambda k: k.encode('utf8')):
+        alternate_records.append(KEY_RECORD.pack(
+            *(strings.add(variant) + (len(target_records),
+                                      len(alternates[variant])))))
+        for target in alternates[variant]:
+            target_records.append(STRING_RECORD.pack(*strings.add(target)))
+
+    # Lay out the sections, and note the offset of each
+    sections = []
+    offsets = {}
+    position = 0
+    for name, records in (('keys', keys),
+                          ('headwords', headword_records),
+                          ('alternates', alternate_records),
+                          ('wordforms', wordform_records),
+                          ('lemmas', lemma_records),
+                          ('targets', target_records)):
+        data = b''.join(records)
+        offsets[name] = [position, len(records)]
+        sections.append(data)
+        position += len(data)
+    offsets['strings'] = position
+    sections.append(strings.data())
+
+    header = dict(offsets)
+    header['wordclasses'] = wordclasses.values
+    header['languages'] = language_table()
+    header = json.dumps(header).encode('utf8')
+
+    stdout.write('Writing %s...\n' % buildconfig.LEXICON_FILE)
+    # Write to a temporary file, then move it into place: so that any
+    #  running process which has the old file mapped will carry on
+    #  reading the old version until it reloads.
+    tmp_file = buildconfig.LEXICON_FILE + '.tmp'
+    os.makedirs(os.path.dirname(buildconfig.LEXICON_FILE), exist_ok=True)
+    with open(tmp_file, 'wb') as filehandle:
+        filehandle.write(MAGIC)
+        filehandle.write(HEADER_LENGTH.pack(len(header)))
+        filehandle.write(header)
+        for data in sections:
+            filehandle.write(data)
+    os.replace(tmp_file, buildconfig.LEXICON_FILE)
+
+
+class _StringPool(object):
+
+    """
+    Pool of UTF-8 strings. Each distinct string is stored only once.
+    """
+
+    def __init__(self):
+        self._offsets = {}
+        self._chunks = []
+        self._length = 0
+
+    def add(self, text):
+        """
+        Add a string to the pool (if not already there); return its
+        (offset, length) as a tuple
+        """
+        try:
+            return self._offsets[text]
+        except KeyError:
+            encoded = (text or '').encode('utf8')
+            location = (self._length, len(encoded))
+            self._chunks.append(encoded)
+            self._length += len(encoded)
+            self._offsets[text] = location
+            return location
+
+    def data(self):
+        return b''.join(self._chunks)
+
+
+class _CodeTable(object):
+
+    """
+    Maps a small set of values (e.g. wordclasses) to integer codes.
+    Code 0 is reserved for None.
+    """
+
+    def __init__(self):
+        self.values = [None, ]
+        self._codes = {None: 0}
+
+    def code(self, value):
+        try:
+            return self._codes[value]
+        except KeyError:
+            self._codes[value] = len(self.values)
+            self.values.append(value)
+            return self._codes[value]
+
+
+def _signed(value):
+    if value is None:
+        return NULL_INT
+    return value
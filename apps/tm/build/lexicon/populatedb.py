@@ -5,11 +5,14 @@ from collections import namedtuple
 from sys import stdout
 
 from lex.oed.languagetaxonomy import LanguageTaxonomy
-from apps.tm.models import Lemma, Wordform, Definition, Language, ProperName
+from apps.tm.models import (Lemma, Wordform, Definition, Language,
+                            ProperName, AlternateKey)
 from apps.tm.build import buildconfig
 
 LEMMA_FIELDS = buildconfig.LEMMA_FIELDS
 BlockData = namedtuple('BlockData', LEMMA_FIELDS)
+LexiconRow = namedtuple('LexiconRow', ['letter', 'lemma_id', 'definition_id',
+                                       'language_id', 'block'])
 
 
 def populate_db():
@@ -24,6 +27,8 @@ def populate_db():
     populate_lexical()
     stdout.write('Populating ProperName records...\n')
     populate_proper_names()
+    stdout.write('Populating AlternateKey records...\n')
+    populate_alternate_keys()
 
 
 def empty_tables():
@@ -35,36 +40,116 @@ def empty_tables():
     Definition.objects.all().delete()
     Language.objects.all().delete()
     ProperName.objects.all().delete()
+    AlternateKey.objects.all().delete()
 
 
 def populate_language():
     """
     Populate the Language table
     """
+    languages = language_table()
+
+    language_objects = []
+    for language_id, name, _ in languages:
+        language_objects.append(Language(id=language_id, name=name, family=None))
+    Language.objects.bulk_create(language_objects)
+
+    for language_id, _, family_id in languages:
+        if family_id is not None:
+            src = Language.objects.get(id=language_id)
+            target = Language.objects.get(id=family_id)
+            src.family = target
+            src.save()
+
+
+def language_table():
+    """
+    Return a list of (id, name, family_id) tuples for each language
+    in the language taxonomy
+    """
     taxonomy = LanguageTaxonomy()
     taxonomy.families = set(buildconfig.LANGUAGE_FAMILIES)
 
     max_length = Language._meta.get_field('name').max_length
 
-    language_objects = []
-    for language in taxonomy.languages():
-        name = language.name[:max_length]
-        language_objects.append(Language(id=language.id, name=name, family=None))
-    Language.objects.bulk_create(language_objects)
-
+    languages = []
     for language in taxonomy.languages():
         family = taxonomy.family_of(language.name)
         if family is not None:
-            src = Language.objects.get(id=language.id)
-            target = Language.objects.get(id=family.id)
-            src.family = target
-            src.save()
+            family_id = family.id
+        else:
+            family_id = None
+        languages.append((language.id, language.name[:max_length], family_id))
+    return languages
 
 
 def populate_lexical():
     """
     Populate the Lemma, Wordform, and Definition tables
     """
+    lemmas = []
+    wordforms = []
+    definitions = []
+    current_letter = None
+    for row in iterate_lexicon():
+        if row.letter != current_letter:
+            current_letter = row.letter
+            stdout.write('Inserting data for %s...\n' % current_letter)
+        block = row.block
+
+        if row.definition_id is not None:
+            definitions.append(Definition(id=row.definition_id,
+                                          text=block.definition[:100]))
+
+        lemmas.append(Lemma(id=row.lemma_id,
+                            lemma=block.lemma,
+                            sort=block.sort,
+                            wordclass=block.wordclass,
+                            firstyear=block.start,
+                            lastyear=block.end,
+                            refentry=block.refentry,
+                            refid=block.refid,
+                            thesaurus_id=block.htlink,
+                            language_id=row.language_id,
+                            definition_id=row.definition_id,
+                            f2000=rounder(block.f2000),
+                            f1950=rounder(block.f1950),
+                            f1900=rounder(block.f1900),
+                            f1850=rounder(block.f1850),
+                            f1800=rounder(block.f1800),
+                            f1750=rounder(block.f1750),))
+
+        for typeunit in typeunits(block):
+            wordforms.append(Wordform(sort=typeunit[0],
+                                      wordform=typeunit[1],
+                                      wordclass=typeunit[2],
+                                      lemma_id=row.lemma_id,
+                                      f2000=rounder(typeunit[4]),
+                                      f1900=rounder(typeunit[5]),
+                                      f1800=rounder(typeunit[6]),))
+
+        if len(lemmas) >= 1000:
+            Definition.objects.bulk_create(definitions)
+            Lemma.objects.bulk_create(lemmas)
+            Wordform.objects.bulk_create(wordforms)
+            definitions = []
+            lemmas = []
+            wordforms = []
+
+    Definition.objects.bulk_create(definitions)
+    Lemma.objects.bulk_create(lemmas)
+    Wordform.objects.bulk_create(wordforms)
+
+
+def iterate_lexicon():
+    """
+    Iterate through the refined lexicon data (as output by refine_index()),
+    yielding a LexiconRow for each block.
+
+    Lemma and definition IDs are assigned in the same sequence each time,
+    so the IDs in the database tables match those in anything else built
+    from the same data (e.g. the compiled lexicon file).
+    """
     in_dir = os.path.join(buildconfig.FORM_INDEX_DIR, 'refined')
     frequency_cutoff = buildconfig.FREQUENCY_CUTOFF
 
@@ -73,74 +158,26 @@ def populate_lexical():
     definition_counter = 0
 
     for letter in string.ascii_lowercase:
-        stdout.write('Inserting data for %s...\n' % letter)
-        blocks = []
         in_file = os.path.join(in_dir, letter + '.json')
         with open(in_file, 'r') as filehandle:
             for line in filehandle:
-                data = json.loads(line.strip())
-                blocks.append(BlockData(*data))
-
-        lemmas = []
-        wordforms = []
-        definitions = []
-        for i, block in enumerate(blocks):
-            lang_node = taxonomy.node(language=block.language)
-            if lang_node is None:
-                language_id = None
-            else:
-                language_id = lang_node.id
-
-            if block.definition and block.f2000 < frequency_cutoff:
-                definition_counter += 1
-                definitions.append(Definition(id=definition_counter,
-                                              text=block.definition[:100]))
-                definition_id = definition_counter
-            else:
-                definition_id = None
-
-            lemma_counter += 1
-            lemmas.append(Lemma(id=lemma_counter,
-                                lemma=block.lemma,
-                                sort=block.sort,
-                                wordclass=block.wordclass,
-                                firstyear=block.start,
-                                lastyear=block.end,
-                                refentry=block.refentry,
-                                refid=block.refid,
-                                thesaurus_id=block.htlink,
-                                language_id=language_id,
-                                definition_id=definition_id,
-                                f2000=_rounder(block.f2000),
-                                f1950=_rounder(block.f1950),
-                                f1900=_rounder(block.f1900),
-                                f1850=_rounder(block.f1850),
-                                f1800=_rounder(block.f1800),
-                                f1750=_rounder(block.f1750),))
-
-            for typelist in (block.standard_types,
-                             block.variant_types,
-                             block.alien_types):
-                for typeunit in typelist:
-                    wordforms.append(Wordform(sort=typeunit[0],
-                                              wordform=typeunit[1],
-                                              wordclass=typeunit[2],
-                                              lemma_id=lemma_counter,
-                                              f2000=_rounder(typeunit[4]),
-                                              f1900=_rounder(typeunit[5]),
-                                              f1800=_rounder(typeunit[6]),))
-
-            if i % 1000 == 0:
-                Definition.objects.bulk_create(definitions)
-                Lemma.objects.bulk_create(lemmas)
-                Wordform.objects.bulk_create(wordforms)
-                definitions = []
-                lemmas = []
-                wordforms = []
-
-        Definition.objects.bulk_create(definitions)
-        Lemma.objects.bulk_create(lemmas)
-        Wordform.objects.bulk_create(wordforms)
+                block = BlockData(*json.loads(line.strip()))
+
+                lang_node = taxonomy.node(language=block.language)
+                if lang_node is None:
+                    language_id = None
+                else:
+                    language_id = lang_node.id
+
+                if block.definition and block.f2000 < frequency_cutoff:
+                    definition_counter += 1
+                    definition_id = definition_counter
+                else:
+                    definition_id = None
+
+                lemma_counter += 1
+                yield LexiconRow(letter, lemma_counter, definition_id,
+                                 language_id, block)
 
 
 def populate_proper_names():
@@ -172,7 +209,42 @@ def populate_proper_names():
     ProperName.objects.bulk_create(names)
 
 
-def _rounder(n):
+def populate_alternate_keys():
+    """
+    Populate the AlternateKey table
+    """
+    keys = []
+    for variant, target in iterate_alternate_keys():
+        keys.append(AlternateKey(variant=variant, target=target))
+        if len(keys) >= 1000:
+            AlternateKey.objects.bulk_create(keys)
+            keys = []
+    AlternateKey.objects.bulk_create(keys)
+
+
+def iterate_alternate_keys():
+    """
+    Iterate through the alternate-key index (as output by
+    index_alternate_keys()), yielding a (variant, target) tuple for
+    each line. Lines are sorted by variant.
+    """
+    in_file = os.path.join(buildconfig.FORM_INDEX_DIR, 'alternates', 'all.txt')
+    with open(in_file) as filehandle:
+        for line in filehandle:
+            data = line.strip().split('\t')
+            if len(data) == 2:
+                yield data[0], data[1]
+
+
+def typeunits(block):
+    for typelist in (block.standard_types,
+                     block.variant_types,
+                     block.alien_types):
+        for typeunit in typelist:
+            yield typeunit
+
+
+def rounder(n):
     n = float('%.2g' % n)
     if n == 0 or n > 1:
         return int(n)
@@ -51,11 +51,50 @@ def refine_forms():
     refine_index()
 
 
+def index_alternates():
+    from apps.tm.build.lexicon.alternateindexer import index_alternate_keys
+    index_alternate_keys()
+
+
 def populate_lexicon_db():
     from apps.tm.build.lexicon.populatedb import populate_db
+    from apps.tm.build.lexicon.compilefilter import compile_lexicon_filter
+    from apps.tm.build.lexicon.compilecompounds import compile_compound_index
+    from apps.tm.lib.lexiconindex import reload_lexicon
     populate_db()
+    compile_lexicon_filter()
+    compile_compound_index()
+    # Make sure that later stages (e.g. prepare_canned_texts) don't use
+    #  stale lexicon data cached in this process
+    reload_lexicon()
+
+
+def compile_lexicon():
+    from apps.tm.build.lexicon.compilelexicon import compile_lexicon_file
+    from apps.tm.lib.lexiconindex import reload_lexicon
+    compile_lexicon_file()
+    reload_lexicon()
 
 
 def prepare_canned_texts():
     from apps.tm.build.canned.preparecannedtexts import prepare_canned_texts
     prepare_canned_texts()
+
+
+def record_lexicon_build():
+    """
+    Record a new lexicon version (see lexicon_version()). This comes after
+    everything derived from the lexicon tables (the lexicon filter,
+    compound index, lexicon file, and canned documents) has been rebuilt;
+    web workers reload their lexicon data when they see the new version,
+    so they mustn't see it before then.
+    """
+    from apps.tm.models import LexiconBuild
+    from apps.tm.lib.lexiconindex import reload_lexicon
+    LexiconBuild.objects.create()
+    reload_lexicon()
+
+
+def refresh_user_submissions():
+    from apps.tm.lib.storeusersubmission import refresh_user_submissions
+    refresh_user_submissions()
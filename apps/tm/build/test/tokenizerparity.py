@@ -0,0 +1,79 @@
+"""
+Check the regex tokenizer against the NLTK tokenizer (see
+lib/tokenizer.py and lib/regextokenizer.py), over all the canned texts.
+"""
+
+from apps.tm.build.canned.cannedloader import CannedLoader
+from apps.tm.lib.tokenizer import nltk_split_text
+from apps.tm.lib.regextokenizer import split_text as regex_split_text
+from apps.tm.lib.utilities import apostrophe_unmasker
+
+NEWLINE = ['<newline>']
+
+
+def tokenizer_parity(verbose=True):
+    """
+    Tokenize each canned text with both backends, and print any
+    sentences where they differ. Returns the number of differences.
+    """
+    loader = CannedLoader()
+    num_sentences = 0
+    differences = 0
+    for doc in loader.iterate():
+        nltk_sentences = _flatten(nltk_split_text(doc.text, doc.year))
+        regex_sentences = _flatten(regex_split_text(doc.text, doc.year))
+        num_sentences += len([s for s in nltk_sentences if s != NEWLINE])
+        diffs = _diff(nltk_sentences, regex_sentences)
+        differences += len(diffs)
+        if diffs and verbose:
+            print('===========================================================')
+            print('#%d %s, %s (%d)' % (doc.id, doc.author, doc.title,
+                                      doc.year))
+            print('===========================================================')
+            for nltk_words, regex_words in diffs:
+                print('nltk:  %s' % ' | '.join(nltk_words))
+                print('regex: %s\n' % ' | '.join(regex_words))
+    print('%d sentences checked; %d differences' % (num_sentences,
+                                                    differences))
+    return differences
+
+
+def _flatten(lines):
+    """
+    Reduce the output of split_text() to a list of sentences, each a
+    list of words (with any masking undone), marking the ends of lines
+    """
+    sentences = []
+    for line in lines:
+        for sentence, words in line:
+            sentences.append([apostrophe_unmasker(w) for w in words])
+        sentences.append(NEWLINE)
+    return sentences
+
+
+def _diff(nltk_sentences, regex_sentences):
+    """
+    Return an (nltk, regex) pair for each line where the two don't
+    match, each giving the words of the line with the ends of sentences
+    marked. (Comparing line by line means that a difference in sentence
+    splitting only gets reported once.)
+    """
+    diffs = []
+    i, j = 0, 0
+    while i < len(nltk_sentences) or j < len(regex_sentences):
+        a = nltk_sentences[i] if i < len(nltk_sentences) else None
+        b = regex_sentences[j] if j < len(regex_sentences) else None
+        if a == b:
+            i += 1
+            j += 1
+            continue
+        # Collect both sides as far as the end of the line
+        nltk_buffer, regex_buffer = [], []
+        while i < len(nltk_sentences) and nltk_sentences[i] != NEWLINE:
+            nltk_buffer.extend(nltk_sentences[i] + ['<s>'])
+            i += 1
+        while j < len(regex_sentences) and regex_sentences[j] != NEWLINE:
+            regex_buffer.extend(regex_sentences[j] + ['<s>'])
+            j += 1
+        diffs.append((nltk_buffer, regex_buffer))
+    return diffs
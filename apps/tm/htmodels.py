@@ -4,6 +4,8 @@ import sys
 from django.db import models
 
 OED_BASE_URL = 'http://www.oed.com/'
+PATH_SEPARATOR = '/'
+BREADCRUMB_SEPARATOR = ' \u00bb '
 
 
 class ThesaurusClass(models.Model):
@@ -14,10 +16,24 @@ class ThesaurusClass(models.Model):
     parent = models.ForeignKey('self', null=True)
     node_size = models.IntegerField()
     branch_size = models.IntegerField()
+    # Materialized path: the IDs of all the ancestor classes, from the
+    #  top of the tree down to (and including) this class, e.g. '1/23/456/'
+    path = models.CharField(max_length=200, null=True, db_index=True)
+    # Precomputed version of breadcrumb()
+    breadcrumb_text = models.TextField(null=True)
 
     class Meta:
         app_label = 'tm'
 
+    def ancestor_ids(self):
+        """
+        Returns a list of the IDs of ancestor classes in ascending order,
+        beginning with self (taken from the materialized path)
+        """
+        return [int(class_id) for class_id in
+                reversed(self.path.rstrip(PATH_SEPARATOR)
+                         .split(PATH_SEPARATOR))]
+
     def ancestors(self):
         """
         Returns a list of ancestor classes in ascending order,
@@ -26,11 +42,38 @@ class ThesaurusClass(models.Model):
         Note that that the present class is included as the first element
         of the list
         """
+        if self.path:
+            # Fetch all the ancestors in a single query
+            ids = self.ancestor_ids()
+            classes = ThesaurusClass.objects.in_bulk(ids[1:])
+            classes[self.id] = self
+            return [classes[class_id] for class_id in ids
+                    if class_id in classes]
         ancestor_list = [self,]
         if self.parent is not None:
             ancestor_list.extend(self.parent.ancestors())
         return ancestor_list
 
+    def descendants(self):
+        """
+        Returns a queryset of all the classes in the branch below this
+        class (not including the class itself)
+        """
+        if self.path:
+            # (The path ends with a separator, so '1/23/' doesn't
+            #  match '1/234/')
+            return ThesaurusClass.objects.filter(
+                path__startswith=self.path).exclude(id=self.id)
+        # If the materialized paths haven't been filled in, walk down
+        #  the tree by parent links instead (one query per level)
+        ids = []
+        frontier = [self.id]
+        while frontier:
+            frontier = list(ThesaurusClass.objects.filter(
+                parent_id__in=frontier).values_list('id', flat=True))
+            ids.extend(frontier)
+        return ThesaurusClass.objects.filter(id__in=ids)
+
     def ancestor(self, level=1):
         """
         Returns the ancestor class at a specified level (defaults to 1)
@@ -43,17 +86,9 @@ class ThesaurusClass(models.Model):
         return None
 
     def breadcrumb(self):
-        ancestors = reversed(self.ancestors())
-        ancestor_strings = []
-        found_wordclass = False
-        for a in ancestors:
-            label = a.label or ''
-            if a.wordclass is not None and not found_wordclass:
-                ancestor_strings.append('%s [%s]' % (label, a.wordclass))
-                found_wordclass = True
-            else:
-                ancestor_strings.append(label)
-        return ' \u00bb '.join([a.strip() for a in ancestor_strings[1:] ])
+        if self.breadcrumb_text is not None:
+            return self.breadcrumb_text
+        return make_breadcrumb(reversed(self.ancestors()))
 
     def indented(self):
         def recurse(node, val):
@@ -85,6 +120,25 @@ class ThesaurusClass(models.Model):
         return json.dumps(self.to_dict())
 
 
+def make_breadcrumb(classes):
+    """
+    Return the breadcrumb string for a list of classes in descending
+    order (i.e. beginning with the top of the tree, ending with the class
+    itself). The top-level class is omitted; and the first class with a
+    wordclass has the wordclass appended.
+    """
+    ancestor_strings = []
+    found_wordclass = False
+    for a in classes:
+        label = a.label or ''
+        if a.wordclass is not None and not found_wordclass:
+            ancestor_strings.append('%s [%s]' % (label, a.wordclass))
+            found_wordclass = True
+        else:
+            ancestor_strings.append(label)
+    return BREADCRUMB_SEPARATOR.join([a.strip() for a in ancestor_strings[1:]])
+
+
 class ThesaurusInstance(models.Model):
 
     lemma = models.CharField(max_length=100, db_index=True)
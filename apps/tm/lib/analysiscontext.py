@@ -0,0 +1,27 @@
+"""
+AnalysisContext - the state belonging to the analysis of a single
+document: the document year (and the frequency period nearest to it),
+and the wordforms prefetched for the document's tokens.
+
+tokenizer() creates one of these for each document, and passes it to
+each of the document's tokens. Nothing about the document being
+analysed is held at class or module level, so documents can be analysed
+concurrently in separate threads (e.g. by threaded WSGI workers).
+"""
+
+# Periods for which the lexicon records wordform frequencies (as the
+#  f1800, f1900, f2000 columns)
+FREQUENCY_PERIODS = (1800, 1900, 2000)
+
+
+class AnalysisContext(object):
+
+    def __init__(self, year):
+        self.year = year
+        # The frequency column for the period nearest to the document
+        #  year (e.g. 'f1900'); see lightpospicker.py
+        self.period = 'f%d' % min(FREQUENCY_PERIODS,
+                                  key=lambda p: abs(p - year))
+        # The wordforms prefetched for the document's tokens (see
+        #  lemmalookup.prefetch_wordforms())
+        self.prefetched = None
@@ -0,0 +1,83 @@
+"""
+analysispool - pool of worker processes, used to lemmatize the lines of
+long documents in parallel (see tokenizer._lemmatize_text()).
+
+The pool is created when first needed, and kept for the life of the
+process. Workers are forked from the calling process, so they share any
+lexicon data it has already loaded; the pool is shut down by
+reload_lexicon(), so that workers never outlive the data they were
+forked with.
+
+This is intended for batch jobs (e.g. prepare_canned_texts); the web
+application analyses each document in the request's own process (see
+ANALYSIS_WORKERS in appsettings.py).
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .lexiconindex import register_reload_hook
+
+# Number of chunks per worker that the items are divided into (so that
+#  a worker which gets a quick chunk can pick up another one)
+CHUNKS_PER_WORKER = 4
+
+_pool = None
+_pool_size = 0
+_lock = threading.Lock()
+
+
+def analysis_pool(workers):
+    """
+    Return the pool of worker processes (creating it if necessary)
+    """
+    global _pool, _pool_size
+    with _lock:
+        if _pool is not None and _pool_size != workers:
+            _pool.shutdown()
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_size = workers
+        return _pool
+
+
+def map_chunks(function, items, *args, **kwargs):
+    """
+    Divide the list of items into chunks, and run function(chunk, *args)
+    on each chunk in the pool. Returns the concatenated results, in the
+    same order as the items.
+
+    The function must be defined at module level (so that it can be
+    pickled), and return a list.
+    """
+    workers = kwargs.get('workers', 1)
+    size = max(1, -(-len(items) // (workers * CHUNKS_PER_WORKER)))
+    pool = analysis_pool(workers)
+    # Workers may get forked during submit(); they mustn't inherit any
+    #  open database connection (which can't be shared with the parent
+    #  process), so close it first. It gets reopened when next needed.
+    _close_connections()
+    futures = [pool.submit(function, items[i:i + size], *args)
+               for i in range(0, len(items), size)]
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
+def _close_connections():
+    from django.db import connections
+    for connection in connections.all():
+        connection.close()
+
+
+def _shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+register_reload_hook(_shutdown)
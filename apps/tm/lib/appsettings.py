@@ -1,5 +1,71 @@
+import os
+
 MAX_WORDLENGTH = 500  # Maximum words in a user-submitted piece of text
 
+# Where lemma_lookup() gets its Wordform/Lemma data from:
+#  'database' - query the database for each lookup
+#  'index' - load the lexicon into memory once per worker process
+#  (see lexiconindex.py)
+#  'file' - memory-map the compiled lexicon file, shared between worker
+#  processes (see lexiconfile.py)
+LEXICON_BACKEND = 'database'
+# How often (in seconds) each worker process checks whether the lexicon
+#  has been rebuilt since it loaded it (see lexicon_version()); so
+#  workers don't need to be restarted after a rebuild
+LEXICON_VERSION_CHECK = 60
+
+# How tokenizer() splits the text into sentences and words:
+#  'nltk' - NLTK's sent_tokenize() and word_tokenize()
+#  'regex' - the single-pass regex tokenizer (see regextokenizer.py),
+#  which follows the same rules without the overhead of NLTK (run the
+#  tmtokenizerparity management command to check it against 'nltk')
+TOKENIZER_BACKEND = 'nltk'
+
+# Compiled data files built by the build pipeline (see build/pipeline.py)
+LEXICON_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'data')
+LEXICON_FILE = os.path.join(LEXICON_DATA_DIR, 'lexicon.bin')
+LEXICON_FILTER_FILE = os.path.join(LEXICON_DATA_DIR, 'lexicon.bloom')
+LEXICON_COMPOUNDS_FILE = os.path.join(LEXICON_DATA_DIR, 'compounds.txt')
+
+# Maximum number of entries in each of the lookup result caches
+#  (see lemmalookup.py)
+LOOKUP_CACHE_SIZE = 50000
+# ...and in the token-resolution cache (see lemmalookup.py)
+RESOLUTION_CACHE_SIZE = 100000
+# ...and in the thesaurus class cache (see thesauruslookup.py)
+THESAURUS_CACHE_SIZE = 20000
+# ...and in the cache of lemmatized lines of text, reused when the same
+#  line turns up again in a document with the same year (see tokenizer.py).
+#  Set to 0 to disable.
+LINE_CACHE_SIZE = 20000
+
+# Number of worker processes that tokenizer() divides the lines of a long
+#  text between (see analysispool.py). 0 means that each text is analysed
+#  in the calling process, which is what the web application should do;
+#  batch jobs pass their own number of workers (see build/buildconfig.py).
+ANALYSIS_WORKERS = 0
+# ...and the minimum number of lines (not already in the line cache)
+#  that a text must have before they're divided between workers
+PARALLEL_MIN_LINES = 200
+
+# Cache-Control max-age (in seconds) for AJAX responses whose content only
+#  changes when the data is rebuilt (see httpcaching.py). Clients
+#  revalidate using the ETag after this.
+HTTP_CACHE_MAX_AGE = 60 * 60 * 24
+# ...and for AJAX responses whose URLs include the lexicon version (so
+#  which can never change)
+HTTP_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Maximum number of gzipped responses kept for reuse (see httpcaching.py)
+COMPRESSED_CACHE_SIZE = 100
+
+# If True, the results page fetches the definitions for all the
+#  document's lemmas in a few batches as soon as it's loaded (rather
+#  than one by one as they're needed)
+PREFETCH_DEFINITIONS = True
+# Maximum number of IDs in a batched definitions request
+MAX_DEFINITION_BATCH = 200
+
 CORE_WORDS = {'the', 'of', 'and', 'to', 'a', 'in', 'for', 'is', 'on',
               'that', 'by', 'this', 'with', 'you', 'it', 'not', 'or',
               'be', 'are', 'from', 'at', 'as', 'your', 'all', 'have',
@@ -0,0 +1,106 @@
+"""
+compoundindex - index of all the multiword and hyphenated wordforms in
+the lexicon (e.g. 'easy chair', 'son-in-law'), organized as a mapping
+of the sort of each one's first word to the set of full sorts which
+continue it.
+
+Used by opencompounds.py to rule out compound hypotheses before
+looking them up.
+
+The index file is built by build/lexicon/compilecompounds.py, as part
+of populate_lexicon_db.
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import defaultdict
+
+from . import appsettings as local_settings
+from .lexicalsort import lexicalsort
+from .lexiconindex import register_reload_hook
+
+LEXICON_COMPOUNDS_FILE = local_settings.LEXICON_COMPOUNDS_FILE
+WORD_SEPARATOR = re.compile(r'[ -]')
+
+_index = None
+_loaded = False
+_lock = threading.Lock()
+
+
+class CompoundIndex(object):
+
+    """
+    Mapping of first-word sort -> set of full sorts
+    """
+
+    def __init__(self):
+        self._continuations = {}
+
+    def __len__(self):
+        return len(self._continuations)
+
+    def load(self, path):
+        continuations = defaultdict(set)
+        with open(path) as filehandle:
+            for line in filehandle:
+                data = line.strip().split('\t')
+                if len(data) == 2:
+                    continuations[sys.intern(data[0])].add(data[1])
+        self._continuations = {first: frozenset(sorts) for first, sorts
+                               in continuations.items()}
+
+    def matches(self, hypothesis):
+        """
+        Return True if the hypothesis (e.g. 'easy chair') matches one
+        of the multiword or hyphenated wordforms in the lexicon
+        """
+        first_word = WORD_SEPARATOR.split(hypothesis, 1)[0]
+        try:
+            continuations = self._continuations[lexicalsort(first_word)]
+        except KeyError:
+            return False
+        return lexicalsort(hypothesis) in continuations
+
+
+def first_word_sort(wordform):
+    """
+    Return the sort of the first word of a multiword or hyphenated
+    wordform (or None if it's not multiword or hyphenated)
+    """
+    words = WORD_SEPARATOR.split(wordform, 1)
+    if len(words) < 2:
+        return None
+    return lexicalsort(words[0]) or None
+
+
+def compound_index():
+    """
+    Return the compound index, loading it if this has not yet been done.
+
+    Returns None if the index file has not been built (in which case
+    the caller should assume that any hypothesis may match).
+    """
+    global _index, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                if os.path.isfile(LEXICON_COMPOUNDS_FILE):
+                    index = CompoundIndex()
+                    index.load(LEXICON_COMPOUNDS_FILE)
+                    _index = index
+                else:
+                    _index = None
+                _loaded = True
+    return _index
+
+
+def _reset():
+    global _index, _loaded
+    with _lock:
+        _index = None
+        _loaded = False
+
+
+register_reload_hook(_reset)
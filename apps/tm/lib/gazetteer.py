@@ -0,0 +1,67 @@
+"""
+gazetteer - in-process copy of the ProperName table, used when testing
+whether a capitalized token is a proper name (see
+Token.check_proper_name()).
+
+The gazetteer is loaded once per worker process (on first use), and
+is discarded when the lexicon tables are reloaded.
+"""
+
+import sys
+import threading
+
+from ..models import ProperName
+from .lexiconindex import register_reload_hook
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+class Gazetteer(object):
+
+    """
+    Proper names keyed by (sort, verbatim form), each mapped to
+    its 'common' flag
+    """
+
+    def __init__(self):
+        self._names = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def load(self):
+        qset = ProperName.objects.values_list('sort', 'lemma', 'common')
+        for sort, name, common in qset.iterator():
+            key = (sys.intern(sort), name)
+            self._names[key] = self._names.get(key, False) or common
+
+    def lookup(self, sort, name):
+        """
+        Return True if the name is a common proper name, False if it's
+        a less common proper name, or None if it's not a known proper name
+        """
+        return self._names.get((sort, name))
+
+
+def gazetteer():
+    """
+    Return the gazetteer, loading it if this has not yet been done
+    """
+    global _gazetteer
+    if _gazetteer is None:
+        with _lock:
+            if _gazetteer is None:
+                names = Gazetteer()
+                names.load()
+                _gazetteer = names
+    return _gazetteer
+
+
+def _reset():
+    global _gazetteer
+    with _lock:
+        _gazetteer = None
+
+
+register_reload_hook(_reset)
@@ -0,0 +1,87 @@
+"""
+httpcaching - helper for returning responses with HTTP validators (ETag)
+and Cache-Control headers, so that browsers and proxies can reuse them.
+"""
+
+import gzip
+import hashlib
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from . import appsettings as local_settings
+from .resultcache import ResultCache
+
+HTTP_CACHE_MAX_AGE = local_settings.HTTP_CACHE_MAX_AGE
+HTTP_IMMUTABLE_MAX_AGE = local_settings.HTTP_IMMUTABLE_MAX_AGE
+
+# Gzipped response bodies, keyed by ETag (so that large responses which
+#  are requested repeatedly aren't compressed afresh every time)
+_compressed_cache = ResultCache(local_settings.COMPRESSED_CACHE_SIZE)
+
+
+def cacheable_response(request, content, content_type='text/plain',
+                       etag=None, max_age=HTTP_CACHE_MAX_AGE,
+                       immutable=False, compress=False):
+    """
+    Return an HttpResponse for the given content, with an ETag (by
+    default, a hash of the content) and a Cache-Control header.
+
+    'immutable' should only be set if the URL itself is versioned,
+    so that the content at that URL can never change.
+
+    If the request's If-None-Match header shows that the client already
+    has this version, returns a 304 (Not Modified) response instead.
+
+    content may be a function returning the content; if an etag is
+    supplied, the function is only called if the full response is needed.
+
+    If 'compress' is set, the content is gzipped for clients which
+    accept it (with an ETag distinct from that of the uncompressed
+    version).
+    """
+    if etag is None:
+        if callable(content):
+            content = content()
+        etag = hashlib.sha1(_encoded(content)).hexdigest()
+
+    gzipped = compress and _accepts_gzip(request)
+    if gzipped:
+        etag += '-gzip'
+
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        if callable(content):
+            content = content()
+        if gzipped:
+            compressed = _compressed_cache.get(etag)
+            if compressed is None:
+                compressed = gzip.compress(_encoded(content))
+                _compressed_cache.set(etag, compressed)
+            content = compressed
+        response = HttpResponse(content, content_type=content_type)
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = quote_etag(etag)
+    if compress:
+        response['Vary'] = 'Accept-Encoding'
+    if immutable:
+        response['Cache-Control'] = ('public, max-age=%d, immutable' %
+                                     HTTP_IMMUTABLE_MAX_AGE)
+    else:
+        response['Cache-Control'] = 'public, max-age=%d' % max_age
+    return response
+
+
+def _encoded(content):
+    if isinstance(content, str):
+        return content.encode('utf8')
+    else:
+        return content
+
+
+def _accepts_gzip(request):
+    encodings = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return 'gzip' in [e.split(';')[0].strip().lower()
+                      for e in encodings.split(',')]
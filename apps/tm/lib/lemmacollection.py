@@ -1,8 +1,12 @@
 
 class LemmaCollection(object):
 
-    def __init__(self, tokens):
-        self._lemmas = _collate_lemmas(tokens)
+    def __init__(self, tokens=None):
+        self._lemmas = {}
+        self._counts = {}
+        self._positions = {}
+        if tokens:
+            self.add_tokens(tokens)
 
     def __len__(self):
         return len(self.lemmas())
@@ -13,10 +17,34 @@ class LemmaCollection(object):
     def lemmas(self):
         return list(self._lemmas.values())
 
+    def add_tokens(self, tokens):
+        """
+        Add the lemmas attached to a further batch of tokens (e.g. the
+        next paragraph of a document being analysed in streaming mode).
+
+        Returns the list of lemmas that were not already in the collection.
+        """
+        new_lemmas = _collate_lemmas(tokens, self._lemmas, self._counts)
+        for lemma in new_lemmas:
+            self._positions[lemma.oed_identifier()] = len(self._positions)
+        return new_lemmas
+
+    def position(self, identifier):
+        """
+        Return the position of the lemma (by OED identifier) in order of
+        first appearance, which is the order of lemmas()
+        """
+        return self._positions[identifier]
+
+    def token_count(self, lemma):
+        """
+        Return the number of tokens in the document attached to the lemma
+        """
+        return self._counts[lemma.oed_identifier()]
+
     def add_counts_to_tokens(self, tokens):
         for token in [t for t in tokens if t.is_in_oed()]:
-            identifier = token.oed_identifier()
-            token.count = self._lemmas[identifier].count
+            token.count = self._counts[token.oed_identifier()]
 
     def rank_by_general_frequency(self):
         rank = self.lemmas()
@@ -27,7 +55,7 @@ class LemmaCollection(object):
     def rank_by_document_frequency(self):
         rank = self.lemmas()
         rank.sort(key=lambda l: l.sort)
-        rank.sort(key=lambda l: l.count, reverse=True)
+        rank.sort(key=self.token_count, reverse=True)
         return rank
 
     def rank_by_year(self):
@@ -39,23 +67,30 @@ class LemmaCollection(object):
     def datastruct(self):
         lemma_struct = []
         for lemma in self.rank_by_document_frequency():
-            lemma_struct.append(lemma.to_list())
+            lemma_struct.append(lemma.to_list(self.token_count(lemma)))
         return lemma_struct
 
 
-def _collate_lemmas(tokens):
+def _collate_lemmas(tokens, lemmas, counts):
     """
-    Collect up all the lemmas attached to tokens; count the number of
-    tokens attached to each lemma (as the .count attribute); map all
-    in the 'lemmas' dictionary (key=oed identifier, value=lemma).
+    Collect up all the lemmas attached to tokens; map all in the
+    'lemmas' dictionary (key=oed identifier, value=lemma), and count
+    the number of tokens attached to each lemma in the 'counts'
+    dictionary (key=oed identifier, value=count).
+
+    (The counts are not set on the lemmas themselves, since these may
+    be shared with other documents being analysed at the same time.)
+
+    Returns the list of lemmas newly added to the dictionary.
     """
-    lemmas = {}
+    new_lemmas = []
     for token in [t for t in tokens if t.is_in_oed()]:
         identifier = token.oed_identifier()
         if identifier in lemmas:
-            lemmas[identifier].count += 1
+            counts[identifier] += 1
         else:
             lemmas[identifier] = token.lemma_manager()
-            lemmas[identifier].count = 1
+            counts[identifier] = 1
+            new_lemmas.append(lemmas[identifier])
 
-    return lemmas
+    return new_lemmas
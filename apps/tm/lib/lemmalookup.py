@@ -1,11 +1,17 @@
 
 import re
-from functools import lru_cache
+import itertools
+import threading
 from collections import namedtuple
+from types import MappingProxyType
 
 from . import appsettings as local_settings
-from ..models import Wordform, Lemma
+from ..models import Wordform, Lemma, AlternateKey
 from .lexicalsort import lexicalsort
+from .lexiconindex import (lexicon_index, register_reload_hook,
+                           WordformRecord, CandidateList)
+from .lexiconfilter import maybe_in_lexicon
+from .resultcache import ResultCache
 
 CORE_WORDS = local_settings.CORE_WORDS
 CALENDAR = local_settings.CALENDAR
@@ -15,14 +21,237 @@ INFLECTIONS = local_settings.INFLECTIONS
 ELIDED_V_PATTERN = re.compile(r"[OEoe]'er")
 BarebonesResponse = namedtuple('BarebonesResponse',
                                ['wordform', 'wordclass', 'lemma'])
+Fallback = namedtuple('Fallback', ['alternatives', 'wordclass'])
+PREFETCH_BATCH_SIZE = 500
+
+# Caches of (materialized) database lookups, shared by all requests
+#  handled by this process
+_wordform_cache = ResultCache(local_settings.LOOKUP_CACHE_SIZE)
+_alternate_cache = ResultCache(local_settings.LOOKUP_CACHE_SIZE)
+# Tokens resolved to candidates (before these are refined for the
+#  document year and sentence position - see lemma_lookup())
+_resolution_cache = ResultCache(local_settings.RESOLUTION_CACHE_SIZE)
+_NOT_CACHED = object()
+
+# Responses for the hardcoded core wordforms (see core_table())
+_core_table = None
+_core_lock = threading.Lock()
 
 
 def lemma_lookup(token, sort, year, **kwargs):
     plural_check = kwargs.get('plural_check', True)
     strict = kwargs.get('strict', False)
     sentence_start = kwargs.get('sentence_start', False)
-    token_low = token.lower()
+    prefetched = kwargs.get('prefetched')
+
+    core_response = _core_response(token)
+    if core_response is not None:
+        # For hardcoded core wordforms, we shortcut the process of
+        #   the wordform and then getting the lemma; the response
+        #   is ready-made (see core_table()).
+        return [core_response, ]
+
+    elif not maybe_resolvable(token, sort):
+        # Definitely not in the lexicon (not even via one of the
+        #  fallback rewrites), so no need to look
+        return []
+
+    else:
+        # Which candidates the token resolves to depends only on the
+        #  token itself and on which of the year-dependent fallback
+        #  rewrites apply; so the resolution is cached on that basis,
+        #  and shared by all documents. Filtering by the antedating margin
+        #  and the sentence position is cheap, so is done afresh each time.
+        key = (token, sort, strict, plural_check, _year_band(year))
+        resolution = _resolution_cache.get(key)
+        if resolution is None:
+            resolution = _resolve_candidates(token, sort, year, strict,
+                                             plural_check, prefetched)
+            _resolution_cache.set(key, resolution)
+        candidates, token = resolution
+
+        response = _refine_candidates(candidates, token, year,
+                                      sentence_start)
+        return response
+
+
+def _resolve_candidates(token, sort, year, strict, plural_check,
+                        prefetched):
+    """
+    Return a (candidates, token) tuple: the CandidateList of wordforms
+    matching the token, and the token (possibly rewritten by one of the
+    fallback rewrites)
+    """
+    candidates = _wordform_lookup(sort, prefetched)
+    if candidates or strict:
+        return candidates, token
+
+    # If no results, try each of the fallback rewrites in turn
+    #  (singular for plural, modernized spellings, etc.). The
+    #  alternate-key index tells us in a single probe which of the
+    #  rewrites could lead to a known wordform, so we only need
+    #  to look up those. (Except for tokens with apostrophes, which
+    #  the index doesn't cover - see alternate_keys() - so all the
+    #  rewrites are tried.)
+    if "'" in token:
+        targets = None
+    else:
+        targets = _alternate_lookup(sort)
+    if targets is None or targets:
+        for fallback in _fallbacks(token, sort, year, plural_check):
+            for sort2, token2 in fallback.alternatives:
+                if targets is None or sort2 in targets:
+                    candidates = _wordform_lookup(sort2, prefetched)
+                if candidates:
+                    token = token2
+                    break
+            if fallback.wordclass is not None:
+                candidates = candidates.filter_wordclass(
+                    fallback.wordclass)
+            if candidates:
+                break
+    return candidates, token
+
+
+def maybe_resolvable(token, sort):
+    """
+    Return False if lemma_lookup() definitely won't find anything for
+    this token (according to the lexicon filter); otherwise True.
+
+    Tokens with apostrophes always pass, since the filter doesn't
+    include the variants produced by the apostrophe rewrites (see
+    alternate_keys()).
+    """
+    return "'" in token or maybe_in_lexicon(sort)
+
+
+def lookup_keys(token, sort, year):
+    """
+    Return the set of sorts that lemma_lookup() may need to look up
+    for this token (i.e. the sort itself, plus the sorts produced by
+    any fallback rewrites), so that these can be prefetched.
+
+    Returns an empty set for core words (which are looked up by lemma),
+    and for tokens which have already been resolved.
+    """
+    if (_core_target(token) or
+            (token, sort, False, True, _year_band(year)) in _resolution_cache):
+        return set()
+    keys = {sort, }
+    for fallback in _fallbacks(token, sort, year, True):
+        keys.update([sort2 for sort2, _ in fallback.alternatives])
+    return keys
+
 
+def prefetch_wordforms(keys):
+    """
+    Fetch wordforms (with their lemmas) for a whole batch of sorts,
+    using a handful of queries.
+
+    Returns a dictionary mapping each of the sorts to a list of wordforms
+    (empty if there are none), which can be passed to lemma_lookup()
+    as the 'prefetched' argument.
+
+    Returns None if the in-process lexicon index is in use (in which case
+    there's nothing to be gained by prefetching).
+    """
+    if lexicon_index() is not None:
+        return None
+    prefetched = {}
+    for key in keys:
+        candidates = _wordform_cache.get(key, _NOT_CACHED)
+        if candidates is not _NOT_CACHED:
+            prefetched[key] = candidates
+
+    # Query the database for anything that wasn't already cached
+    missing = sorted([key for key in keys if key not in prefetched])
+    for i in range(0, len(missing), PREFETCH_BATCH_SIZE):
+        batch = missing[i:i + PREFETCH_BATCH_SIZE]
+        results = {key: [] for key in batch}
+        qset = (Wordform.objects.filter(sort__in=batch)
+                .select_related('lemma'))
+        for wordform in qset:
+            results[wordform.sort].append(_wordform_record(wordform))
+        for key, candidates in results.items():
+            prefetched[key] = CandidateList(candidates)
+            _wordform_cache.set(key, prefetched[key])
+
+    # Likewise fetch the alternate keys for any sorts with no wordforms,
+    #  in case they're needed for the fallback rewrites (see
+    #  _alternate_lookup())
+    missing = sorted([key for key, candidates in prefetched.items()
+                      if not candidates and maybe_in_lexicon(key) and
+                      _alternate_cache.get(key) is None])
+    for i in range(0, len(missing), PREFETCH_BATCH_SIZE):
+        batch = missing[i:i + PREFETCH_BATCH_SIZE]
+        results = {key: set() for key in batch}
+        qset = (AlternateKey.objects.filter(variant__in=batch)
+                .values_list('variant', 'target'))
+        for variant, target in qset:
+            results[variant].add(target)
+        for key, targets in results.items():
+            _alternate_cache.set(key, frozenset(targets))
+    return prefetched
+
+
+def core_table():
+    """
+    Return the table of ready-made responses for the hardcoded core
+    wordforms (CORE_WORDS, INFLECTIONS, etc.), building it if this has
+    not yet been done. The table is rebuilt after the lexicon is reloaded.
+    """
+    global _core_table
+    if _core_table is None:
+        with _core_lock:
+            if _core_table is None:
+                _core_table = _build_core_table()
+    return _core_table
+
+
+def _build_core_table():
+    """
+    Build a (read-only) mapping of each core wordform to a
+    BarebonesResponse.
+
+    For core wordforms, we skip looking up the wordform and then getting
+    the lemma; we just get the lemma directly (the one we want will be the
+    most frequent lemma). This means we then have to fake a response with
+    a skeleton wordform object containing the lemma. We give the
+    wordform the same wordclass as the lemma; which won't always be
+    quite true, but should be close enough to be not worth worrying about.
+    """
+    forms = (set(INFLECTIONS) | CORE_WORDS | INDEFINITE_ARTICLES |
+             CALENDAR)
+    targets = {form: _core_target(form) for form in forms}
+    lemmas = _top_lemmas(set(targets.values()))
+    table = {}
+    for form, target in targets.items():
+        lemma = lemmas.get(target)
+        if lemma is not None:
+            table[form] = BarebonesResponse(form, lemma.wordclass, lemma)
+    return MappingProxyType(table)
+
+
+def _core_response(token):
+    """
+    Return the ready-made response if this is one of the hardcoded
+    core wordforms; otherwise None
+    """
+    table = core_table()
+    response = table.get(token.lower())
+    if response is None and token in CALENDAR:
+        response = table.get(token)
+    if response is not None and response.wordform != token:
+        response = response._replace(wordform=token)
+    return response
+
+
+def _core_target(token):
+    """
+    Return the target lemma form if this is one of the hardcoded
+    core wordforms; otherwise None
+    """
+    token_low = token.lower()
     target_lemma = INFLECTIONS.get(token_low, None)
     if (not target_lemma and
             (token_low in CORE_WORDS or
@@ -30,151 +259,250 @@ def lemma_lookup(token, sort, year, **kwargs):
         target_lemma = token_low
     if not target_lemma and token in CALENDAR:
         target_lemma = token
+    return target_lemma
 
-    if target_lemma:
-        # For hardcoded core wordforms, we shortcut the process of
-        #   the wordform and then getting the lemma; we just get the lemma
-        #   directly. This means we then have to fake a response with a skeleton
-        #   wordform object containing the lemma.
-        # Look up the lemma
-        qset = _cached_lemma_lookup(target_lemma)
-        # The one we want will be the most frequent lemma
-        lemma = qset.order_by('-f2000').first()
-        # Fake a barebones Wordform object containing the lemma. We give the
-        #  wordform the same wordclass as the lemma; which won't always be
-        #  quote true, but should be close enough to be not worth
-        #  worrying about.
-        response = [BarebonesResponse(token, lemma.wordclass, lemma), ]
-        return response
 
-    else:
-        qset = _cached_wordform_lookup(sort)
-
-        # If no results...
-        if not qset.exists() and not strict:
-            # If the token looks like it might be a plural
-            #  (i.e. ends with 's'), try again with singular equivalent.
-            if (plural_check and
-                    len(sort) >= 5 and
-                    sort.endswith('s') and
-                    not sort.endswith('ss')):
-                sort_singular = sort.rstrip('s')
-                qset = _cached_wordform_lookup(sort_singular)
-
-            # Try converting -ise- forms to -ize-
-            if not qset.exists() and 'is' in sort:
-                match = re.search(r'(....is(e|ing|at|able))', sort)
-                if match is not None:
-                    before = match.group(1)
-                    after = before.replace('s', 'z')
-                    sort2 = sort.replace(before, after)
-                    qset = _cached_wordform_lookup(sort2)
-                    if qset.exists():
-                        token = token.replace('is', 'iz')
-
-            # Try modernizing archaic '-eth' and '-est' endings
-            if (not qset.exists() and year < 1900 and
-                    (sort.endswith('eth') or
-                    sort.endswith('est'))):
-                sort2 = re.sub(r"(...)e(th|st)$", r'\1s', sort)
-                sort3 = re.sub(r"(...)e(th|st)$", r'\1es', sort)
-                qset = _cached_wordform_lookup(sort2)
-                if not qset.exists():
-                    qset = _cached_wordform_lookup(sort3)
-                qset = qset.filter(wordclass='VBZ')
-
-            if (not qset.exists() and year < 1900 and
-                    token.endswith("'st")):
-                sort2 = re.sub(r"(...)st$", r'\1s', sort)
-                sort3 = re.sub(r"(...)st$", r'\1es', sort)
-                qset = _cached_wordform_lookup(sort2)
-                if not qset.exists():
-                    qset = _cached_wordform_lookup(sort3)
-                qset = qset.filter(wordclass='VBZ')
-
-            # Try modernizing archaic '-ick/-icke/-ique' to '-ic'
-            if (not qset.exists() and year < 1800 and
-                    re.search(r'i(ck|cke|que)$', sort)):
-                sort2 = re.sub(r'i(ck|cke|que)$', r'ic', sort)
-                qset = _cached_wordform_lookup(sort2)
-                if qset.exists():
-                    token = re.sub(r'i(ck|cke|que)$', r'ic', token)
-                qset = qset.filter(wordclass='JJ')
-
-            if not qset.exists() and year < 1800 and 'ickal' in sort:
-                sort2 = sort.replace('ickal', 'ical')
-                qset = _cached_wordform_lookup(sort2)
-                if qset.exists():
-                    token = token.replace('ickal', 'ical')
-                qset = qset.filter(wordclass='JJ')
-
-            # Try modernizing 'o'er' to 'over', etc.
-            if (not qset.exists() and year < 1900 and
-                    ELIDED_V_PATTERN.search(token)):
-                sort2 = sort.replace('oer', 'over').replace('eer', 'ever')
-                qset = _cached_wordform_lookup(sort2)
-                if qset.exists():
-                    token = token.replace("'er", 'ver')
-
-            # Try modernizing 'flow'rets' to 'flowerets',
-            #  'am'rous' to 'amorous',  etc.
-            if not qset.exists() and "'" in token:
-                token2 = token.replace("'", 'e')
-                sort2 = lexicalsort(token2)
-                qset = _cached_wordform_lookup(sort2)
-                if qset.exists():
-                    token = token2
-                else:
-                    token2 = token.replace("'", 'o')
-                    sort2 = lexicalsort(token2)
-                    qset = _cached_wordform_lookup(sort2)
-                    if qset.exists():
-                        token = token2
-
-            # Try extending -in ending to -ing
-            if not qset.exists() and year > 1850 and sort.endswith('in'):
-                sort2 = sort + 'g'
-                qset = _cached_wordform_lookup(sort2)
-                if qset.exists():
-                    token += 'g'
-
-        response = _refine_candidates(qset, token, year, sentence_start)
-        return response
+def _fallbacks(token, sort, year, plural_check):
+    """
+    Generate the fallback rewrites to be tried (in order) if the
+    token's sort is not found.
+
+    Each is a Fallback tuple: 'alternatives' is a list of (sort, token)
+    pairs, tried in order until one is found; 'wordclass' (if not None)
+    restricts the wordforms found to that wordclass.
+    """
+    # If the token looks like it might be a plural
+    #  (i.e. ends with 's'), try again with singular equivalent.
+    if (plural_check and
+            len(sort) >= 5 and
+            sort.endswith('s') and
+            not sort.endswith('ss')):
+        yield Fallback([(sort.rstrip('s'), token)], None)
+
+    # Try converting -ise- forms to -ize-
+    if 'is' in sort:
+        match = re.search(r'(....is(e|ing|at|able))', sort)
+        if match is not None:
+            before = match.group(1)
+            after = before.replace('s', 'z')
+            yield Fallback([(sort.replace(before, after),
+                             token.replace('is', 'iz'))], None)
+
+    # Try modernizing archaic '-eth' and '-est' endings
+    if (year < 1900 and
+            (sort.endswith('eth') or
+            sort.endswith('est'))):
+        sort2 = re.sub(r"(...)e(th|st)$", r'\1s', sort)
+        sort3 = re.sub(r"(...)e(th|st)$", r'\1es', sort)
+        yield Fallback([(sort2, token), (sort3, token)], 'VBZ')
+
+    if year < 1900 and token.endswith("'st"):
+        sort2 = re.sub(r"(...)st$", r'\1s', sort)
+        sort3 = re.sub(r"(...)st$", r'\1es', sort)
+        yield Fallback([(sort2, token), (sort3, token)], 'VBZ')
+
+    # Try modernizing archaic '-ick/-icke/-ique' to '-ic'
+    if year < 1800 and re.search(r'i(ck|cke|que)$', sort):
+        sort2 = re.sub(r'i(ck|cke|que)$', r'ic', sort)
+        token2 = re.sub(r'i(ck|cke|que)$', r'ic', token)
+        yield Fallback([(sort2, token2)], 'JJ')
+
+    if year < 1800 and 'ickal' in sort:
+        yield Fallback([(sort.replace('ickal', 'ical'),
+                         token.replace('ickal', 'ical'))], 'JJ')
+
+    # Try modernizing 'o'er' to 'over', etc.
+    if year < 1900 and ELIDED_V_PATTERN.search(token):
+        sort2 = sort.replace('oer', 'over').replace('eer', 'ever')
+        yield Fallback([(sort2, token.replace("'er", 'ver'))], None)
+
+    # Try modernizing 'flow'rets' to 'flowerets',
+    #  'am'rous' to 'amorous',  etc.
+    if "'" in token:
+        token2 = token.replace("'", 'e')
+        token3 = token.replace("'", 'o')
+        yield Fallback([(lexicalsort(token2), token2),
+                        (lexicalsort(token3), token3)], None)
+
+    # Try extending -in ending to -ing
+    if year > 1850 and sort.endswith('in'):
+        yield Fallback([(sort + 'g', token + 'g')], None)
+
+
+def alternate_keys(sort):
+    """
+    Generate variant sorts which one of the fallback rewrites in
+    _fallbacks() might convert to the given sort - i.e. the inverse
+    of _fallbacks(). Used at build time to compile the alternate-key
+    index (see build/lexicon/alternateindexer.py).
+
+    This may over-generate (e.g. ignoring the year or the form of the
+    token), since _fallbacks() is still run at lookup time: the index
+    only needs to include every variant that could possibly apply.
+
+    The rewrites which only apply to tokens with apostrophes ("o'er",
+    "flow'rets", "know'st") are left out: with several apostrophes in a
+    token, the variants multiply, and such tokens are rare enough that
+    lemma_lookup() can just try all the rewrites (see maybe_resolvable()).
+    """
+    # Plurals
+    if not sort.endswith('s') and len(sort) >= 4:
+        yield sort + 's'
+
+    # -ise- forms for -ize- forms. (The rewrite converts any 's' in the
+    #  four characters before 'is' as well, so any 'z' there may have
+    #  been an 's'.)
+    for match in re.finditer(r'(?=(....iz(e|ing|at|able)))', sort):
+        after = match.group(1)
+        for prefix in _substitutions(after[:4], 'z', 's', minimum=0):
+            before = prefix + 'is' + after[6:]
+            for variant in _substitutions(sort, after, before):
+                yield variant
+
+    # Archaic '-eth' and '-est' endings
+    for ending in ('es', 's'):
+        if sort.endswith(ending) and len(sort) - len(ending) >= 3:
+            stem = sort[:-len(ending)]
+            yield stem + 'eth'
+            yield stem + 'est'
+
+    # Archaic '-ick/-icke/-ique' and '-ickal'
+    if sort.endswith('ic'):
+        for ending in ('ick', 'icke', 'ique'):
+            yield sort[:-2] + ending
+    for variant in _substitutions(sort, 'ical', 'ickal'):
+        yield variant
+
+    # '-in' for '-ing'
+    if sort.endswith('ing'):
+        yield sort[:-1]
+
+
+def _substitutions(text, old, new, minimum=1):
+    """
+    Generate versions of the text with each combination of at least
+    'minimum' of the occurrences of 'old' replaced by 'new' (since a
+    rewrite using str.replace() may have merged these with occurrences
+    of 'old' that were there already)
+    """
+    positions = []
+    position = text.find(old)
+    while position != -1:
+        positions.append(position)
+        position = text.find(old, position + len(old))
+    for count in range(minimum, len(positions) + 1):
+        for chosen in itertools.combinations(positions, count):
+            pieces = []
+            last = 0
+            for position in chosen:
+                pieces.append(text[last:position])
+                pieces.append(new)
+                last = position + len(old)
+            pieces.append(text[last:])
+            yield ''.join(pieces)
+
 
+def _year_band(year):
+    """
+    Return a tuple identifying which of the year-dependent fallback
+    rewrites apply to a given year. (This must be kept in step with
+    the year tests in _fallbacks().)
+    """
+    return (year < 1800, year < 1900, year > 1850)
 
-def _refine_candidates(qset, token, year, sentence_start):
+
+def _refine_candidates(candidates, token, year, sentence_start):
     """
-    Ditch any candidates from the query set that don't seem
-    viable; return the rest as a list.
+    Ditch any candidates that don't seem viable; return the rest as a list.
     """
-    antedating_margin = _set_antedating_margin(year)
+    # Pick the wordform(s) that give the best match to the token
+    #   (capitalization, diacritics, etc.)
+    # - But allow for case variation at the start of the sentence
+    return candidates.refine(token, _set_antedating_margin(year),
+                             sentence_start)
+
 
-    if not qset.exists():
-        response = []
+def _wordform_lookup(target, prefetched=None):
+    """
+    Return a CandidateList of wordforms matching the target sort - from
+    the prefetched wordforms, if the sort is included there; or from the
+    in-process lexicon index, if this is in use; otherwise from
+    the database.
+    """
+    if prefetched is not None and target in prefetched:
+        return prefetched[target]
+    index = lexicon_index()
+    if index is not None:
+        return index.candidates(target)
     else:
-        qset = qset.filter(lemma__firstyear__lt=antedating_margin)
-        # Pick the wordform(s) that give the best match to the token
-        #   (capitalization, diacritics, etc.)
-        # - But allow for case variation at the start of the sentence
-        response = list(qset)
-        if qset.count() > 1:
-            if sentence_start:
-                qset2 = qset.filter(wordform__iexact=token)
-            else:
-                qset2 = qset.filter(wordform=token)
-            if qset2:
-                response = list(qset2)
-    return response
+        return _cached_wordform_lookup(target)
 
 
-@lru_cache(maxsize=512)
-def _cached_lemma_lookup(target):
-    return Lemma.objects.filter(lemma=target)
+def _alternate_lookup(sort):
+    """
+    Return the set of known sorts that this sort may be a variant of
+    (according to the alternate-key index)
+    """
+    index = lexicon_index()
+    if index is not None:
+        return index.alternates(sort)
+    targets = _alternate_cache.get(sort)
+    if targets is None:
+        targets = frozenset(AlternateKey.objects.filter(variant=sort)
+                            .values_list('target', flat=True))
+        _alternate_cache.set(sort, targets)
+    return targets
+
+
+def _top_lemmas(targets):
+    """
+    Return a dictionary mapping each of the target lemma forms to the
+    highest-frequency lemma matching it (if there is one)
+    """
+    index = lexicon_index()
+    if index is not None:
+        lemmas = {target: index.top_lemma(target) for target in targets}
+    else:
+        lemmas = {}
+        qset = Lemma.objects.filter(lemma__in=targets).order_by('-f2000')
+        for lemma in qset:
+            lemmas.setdefault(lemma.lemma, lemma)
+    return lemmas
 
 
-@lru_cache(maxsize=512)
 def _cached_wordform_lookup(target):
-    return Wordform.objects.filter(sort=target)
+    """
+    Return a CandidateList of wordform records matching the target sort
+    """
+    candidates = _wordform_cache.get(target, _NOT_CACHED)
+    if candidates is _NOT_CACHED:
+        qset = (Wordform.objects.filter(sort=target)
+                .select_related('lemma'))
+        candidates = CandidateList([_wordform_record(w) for w in qset])
+        _wordform_cache.set(target, candidates)
+    return candidates
+
+
+def _wordform_record(wordform):
+    """
+    Convert a Wordform object to an (immutable) WordformRecord
+    """
+    return WordformRecord(wordform.wordform,
+                          wordform.sort,
+                          wordform.wordclass,
+                          wordform.lemma,
+                          wordform.f2000,
+                          wordform.f1900,
+                          wordform.f1800)
+
+
+def cache_stats():
+    """
+    Return hit/miss/eviction counters for the lookup caches
+    """
+    return {'resolutions': _resolution_cache.stats(),
+            'wordforms': _wordform_cache.stats(),
+            'alternates': _alternate_cache.stats()}
 
 
 def _set_antedating_margin(year):
@@ -189,3 +517,15 @@ def _set_antedating_margin(year):
         return year + 50
     else:
         return year + 100
+
+
+def _reset_core_table():
+    global _core_table
+    with _core_lock:
+        _core_table = None
+
+
+register_reload_hook(_reset_core_table)
+register_reload_hook(_resolution_cache.clear)
+register_reload_hook(_wordform_cache.clear)
+register_reload_hook(_alternate_cache.clear)
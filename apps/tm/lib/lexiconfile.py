@@ -0,0 +1,209 @@
+"""
+lexiconfile - read-only access to the compiled binary lexicon file
+(built by build/lexicon/compilelexicon.py).
+
+The file is opened with mmap, so every worker process on a host shares
+the same physical pages, and nothing is deserialized up front: lookups
+binary-search a sorted key table, and build records only for the
+wordforms that match.
+
+File layout (integers are little-endian):
+ - MAGIC (8 bytes)
+ - length of the JSON header (uint32)
+ - JSON header: section offsets and record counts, plus the small
+    lookup tables (wordclasses and languages)
+ - key table: a KEY_RECORD for each distinct wordform sort, sorted
+ - headword table: a KEY_RECORD for each distinct lemma headword, sorted
+ - alternate-key table: a KEY_RECORD for each variant sort in the
+    alternate-key index, sorted
+ - wordform table: a WORDFORM_RECORD for each wordform, grouped by sort
+    and ordered by frequency within each group
+ - lemma table: a LEMMA_RECORD for each lemma
+ - alternate target table: a STRING_RECORD for each target sort in the
+    alternate-key index, grouped by variant
+ - string pool (UTF-8)
+
+Section offsets in the header are relative to the end of the header.
+"""
+
+import json
+import mmap
+import struct
+
+from .lexiconindex import (LanguageRecord, LemmaRecord, WordformRecord,
+                           CandidateList)
+
+MAGIC = b'TMLEX002'
+HEADER_LENGTH = struct.Struct('<I')
+# string offset, string length, first record, number of records
+KEY_RECORD = struct.Struct('<IIII')
+# string offset, string length
+STRING_RECORD = struct.Struct('<II')
+# wordform offset, wordform length, wordclass code, lemma record,
+#  f2000, f1900, f1800
+WORDFORM_RECORD = struct.Struct('<IIHIddd')
+# id, lemma offset, lemma length, sort offset, sort length, wordclass code,
+#  firstyear, lastyear, refentry, refid, language_id, definition_id,
+#  thesaurus_id, f2000, f1950, f1900, f1850, f1800, f1750
+LEMMA_RECORD = struct.Struct('<IIIIIHiiIIIIIdddddd')
+# Stands in for None in the signed integer columns (firstyear, lastyear);
+#  in unsigned ID columns, 0 stands in for None.
+NULL_INT = -2 ** 31
+
+
+class LexiconFile(object):
+
+    """
+    Lookup interface to the compiled lexicon file; supports the
+    same lookup methods as LexiconIndex.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as filehandle:
+            self._mmap = mmap.mmap(filehandle.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError('%s is not a compiled lexicon file' % path)
+        start = len(MAGIC) + HEADER_LENGTH.size
+        header_length = HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))[0]
+        header = json.loads(self._mmap[start:start + header_length]
+                            .decode('utf8'))
+        self._base = start + header_length
+
+        self._keys = header['keys']
+        self._headwords = header['headwords']
+        self._alternates = header['alternates']
+        self._target_offset = header['targets'][0]
+        self._wordform_offset = header['wordforms'][0]
+        self._lemma_offset = header['lemmas'][0]
+        self._string_offset = header['strings']
+        self._wordclasses = header['wordclasses']
+
+        self._languages = {}
+        for language_id, name, _ in header['languages']:
+            self._languages[language_id] = LanguageRecord(language_id, name)
+        for language_id, _, family_id in header['languages']:
+            if family_id is not None:
+                self._languages[language_id].family = \
+                    self._languages.get(family_id)
+
+    def __len__(self):
+        return self._keys[1]
+
+    def close(self):
+        self._mmap.close()
+
+    def wordforms(self, sort):
+        """
+        Return a tuple of records for all the wordforms matching
+        a given sort (empty if there are none)
+        """
+        match = self._search(self._keys, sort)
+        if match is None:
+            return ()
+        first, count = match
+        records = []
+        for i in range(first, first + count):
+            offset = (self._base + self._wordform_offset +
+                      i * WORDFORM_RECORD.size)
+            (form_offset, form_length, wordclass, lemma_index,
+             f2000, f1900, f1800) = WORDFORM_RECORD.unpack_from(self._mmap,
+                                                                offset)
+            records.append(WordformRecord(self._string(form_offset,
+                                                       form_length),
+                                          sort,
+                                          self._wordclasses[wordclass],
+                                          self._lemma(lemma_index),
+                                          f2000,
+                                          f1900,
+                                          f1800))
+        return tuple(records)
+
+    def candidates(self, sort):
+        """
+        Return a CandidateList of the wordforms matching a given sort
+        """
+        return CandidateList(self.wordforms(sort))
+
+    def top_lemma(self, headword):
+        """
+        Return the highest-frequency lemma record for a given
+        headword (or None)
+        """
+        match = self._search(self._headwords, headword)
+        if match is None:
+            return None
+        return self._lemma(match[0])
+
+    def alternates(self, sort):
+        """
+        Return the set of known sorts that this sort may be a variant of
+        (according to the alternate-key index)
+        """
+        match = self._search(self._alternates, sort)
+        if match is None:
+            return frozenset()
+        first, count = match
+        targets = set()
+        for i in range(first, first + count):
+            offset = self._base + self._target_offset + i * STRING_RECORD.size
+            targets.add(self._string(*STRING_RECORD.unpack_from(self._mmap,
+                                                                offset)))
+        return frozenset(targets)
+
+    def _search(self, table, key):
+        """
+        Binary-search a key table for the given key; return a
+        (first record, number of records) tuple, or None if the key
+        is not found.
+        """
+        table_offset, count = table
+        key = key.encode('utf8')
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            (string_offset, string_length,
+             first, num) = KEY_RECORD.unpack_from(
+                self._mmap,
+                self._base + table_offset + middle * KEY_RECORD.size)
+            candidate = self._bytes(string_offset, string_length)
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return first, num
+        return None
+
+    def _lemma(self, index):
+        offset = self._base + self._lemma_offset + index * LEMMA_RECORD.size
+        (lemma_id, lemma_offset, lemma_length, sort_offset, sort_length,
+         wordclass, firstyear, lastyear, refentry, refid, language_id,
+         definition_id, thesaurus_id, f2000, f1950, f1900, f1850, f1800,
+         f1750) = LEMMA_RECORD.unpack_from(self._mmap, offset)
+        row = (lemma_id,
+               self._string(lemma_offset, lemma_length),
+               self._string(sort_offset, sort_length),
+               self._wordclasses[wordclass],
+               _nullable(firstyear, NULL_INT),
+               _nullable(lastyear, NULL_INT),
+               refentry,
+               _nullable(refid, 0),
+               _nullable(language_id, 0),
+               _nullable(definition_id, 0),
+               _nullable(thesaurus_id, 0),
+               f2000, f1950, f1900, f1850, f1800, f1750)
+        return LemmaRecord(row, self._languages)
+
+    def _bytes(self, offset, length):
+        start = self._base + self._string_offset + offset
+        return self._mmap[start:start + length]
+
+    def _string(self, offset, length):
+        return self._bytes(offset, length).decode('utf8')
+
+
+def _nullable(value, null_value):
+    if value == null_value:
+        return None
+    return value
@@ -0,0 +1,141 @@
+"""
+lexiconfilter - Bloom filter of every sort that lemma_lookup() could
+find something for (i.e. all wordform sorts, plus all the variant sorts
+in the alternate-key index).
+
+If the filter says a sort is not there, it's definitely not there, so
+the lookup can be skipped. (It may occasionally say that a sort is there
+when it isn't; in which case the lookup just goes ahead as normal.)
+Tokens with apostrophes are looked up regardless, since the alternate-key
+index doesn't cover their variants (see lemmalookup.maybe_resolvable()).
+
+The filter file is built by build/lexicon/compilefilter.py, as part of
+populate_lexicon_db.
+"""
+
+import os
+import hashlib
+import math
+import struct
+import threading
+
+from . import appsettings as local_settings
+from .lexiconindex import register_reload_hook
+
+LEXICON_FILTER_FILE = local_settings.LEXICON_FILTER_FILE
+# (Changes whenever the file format - or the hashing - changes, so that
+#  a filter built by an earlier version is never used)
+MAGIC = b'TMBLM002'
+# number of bits, number of hash functions
+HEADER = struct.Struct('<QI')
+
+_filter = None
+_loaded = False
+_lock = threading.Lock()
+
+
+class BloomFilter(object):
+
+    """
+    Bloom filter of strings, stored as a bit array
+    """
+
+    def __init__(self, num_bits, num_hashes, bits=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        if bits is None:
+            bits = bytearray((num_bits + 7) // 8)
+        self.bits = bits
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate):
+        """
+        Return an empty filter sized to hold the given number of items
+        with (roughly) the given false-positive rate
+        """
+        capacity = max(capacity, 1)
+        num_bits = int(math.ceil(-capacity * math.log(error_rate) /
+                                 (math.log(2) ** 2)))
+        num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+        return cls(num_bits, num_hashes)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as filehandle:
+            data = filehandle.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('%s is not a lexicon filter file' % path)
+        num_bits, num_hashes = HEADER.unpack_from(data, len(MAGIC))
+        return cls(num_bits, num_hashes,
+                   bits=data[len(MAGIC) + HEADER.size:])
+
+    def save(self, path):
+        # Write to a temporary file, then move it into place (see
+        #  compilelexicon.py)
+        tmp_file = path + '.tmp'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_file, 'wb') as filehandle:
+            filehandle.write(MAGIC)
+            filehandle.write(HEADER.pack(self.num_bits, self.num_hashes))
+            filehandle.write(self.bits)
+        os.replace(tmp_file, path)
+
+    def add(self, text):
+        for position in self._positions(text):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, text):
+        for position in self._positions(text):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _positions(self, text):
+        # Double hashing: derive all the bit positions from a single digest
+        digest = hashlib.md5(text.encode('utf8')).digest()
+        hash1 = int.from_bytes(digest[:8], 'little')
+        hash2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (hash1 + i * hash2) % self.num_bits
+
+
+def lexicon_filter():
+    """
+    Return the lexicon filter, loading it if this has not yet been done.
+
+    Returns None if the filter file has not been built, or is out of
+    date (in which case the caller should assume that any sort may be in
+    the lexicon).
+    """
+    global _filter, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                try:
+                    _filter = BloomFilter.load(LEXICON_FILTER_FILE)
+                except (IOError, ValueError):
+                    # Not built yet, or built by an earlier version
+                    _filter = None
+                _loaded = True
+    return _filter
+
+
+def maybe_in_lexicon(sort):
+    """
+    Return False if the lexicon definitely has nothing for this sort
+    (neither as a wordform nor as an alternate key); otherwise True.
+    """
+    bloom_filter = lexicon_filter()
+    if bloom_filter is None:
+        return True
+    return sort in bloom_filter
+
+
+def _reset():
+    global _filter, _loaded
+    with _lock:
+        _filter = None
+        _loaded = False
+
+
+register_reload_hook(_reset)
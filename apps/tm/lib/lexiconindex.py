@@ -0,0 +1,326 @@
+"""
+lexiconindex - in-process copy of the Wordform, Lemma, and Language
+tables, used by lemma_lookup() in place of per-token database queries.
+
+The index is loaded once per worker process (on first use), and holds
+compact slot-based records keyed by lexical sort. Call reload_lexicon()
+after the lexicon tables have been repopulated (see build/pipeline.py);
+other processes (e.g. web workers) notice the rebuild via
+lexicon_version(), and reload the lexicon themselves.
+"""
+
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple, defaultdict
+
+from . import appsettings as local_settings
+from ..models import (LemmaBase, Lemma, Wordform, Language, AlternateKey,
+                      LexiconBuild)
+
+LEXICON_BACKEND = local_settings.LEXICON_BACKEND
+LEXICON_FILE = local_settings.LEXICON_FILE
+LEXICON_VERSION_CHECK = local_settings.LEXICON_VERSION_CHECK
+LEMMA_COLUMNS = ('id', 'lemma', 'sort', 'wordclass', 'firstyear',
+                 'lastyear', 'refentry', 'refid', 'language_id',
+                 'definition_id', 'thesaurus_id', 'f2000', 'f1950',
+                 'f1900', 'f1850', 'f1800', 'f1750')
+WORDFORM_COLUMNS = ('wordform', 'sort', 'wordclass', 'lemma_id',
+                    'f2000', 'f1900', 'f1800')
+
+# Stands in for a Wordform object. (Since this is a tuple, it's
+#  immutable: so can be shared safely between lookups.)
+WordformRecord = namedtuple('WordformRecord', ['wordform', 'sort',
+                                               'wordclass', 'lemma',
+                                               'f2000', 'f1900', 'f1800'])
+
+_index = None
+_version = None
+_version_checked = 0
+_languages = None
+_lock = threading.Lock()
+_reload_hooks = []
+
+
+class LanguageRecord(object):
+
+    """
+    Stands in for a Language object
+    """
+
+    __slots__ = ('id', 'name', 'family')
+
+    def __init__(self, id, name, family=None):
+        self.id = id
+        self.name = name
+        self.family = family
+
+
+class CandidateList(object):
+
+    """
+    The wordform records for a given sort, in frequency order (highest
+    first), indexed by the first year of each record's lemma; so that
+    candidates which postdate a document can be cut off with a bisect,
+    rather than by checking each record.
+
+    Case-folded versions of the wordforms are stored alongside the
+    originals, for matching tokens at the start of a sentence.
+    """
+
+    __slots__ = ('records', 'firstyears', '_by_year', '_folded')
+
+    def __init__(self, records):
+        self.records = tuple(records)
+        # Records whose lemma has no first year are never viable
+        dated = sorted([(record.lemma.firstyear, i) for i, record
+                        in enumerate(self.records)
+                        if record.lemma.firstyear is not None])
+        self.firstyears = [firstyear for firstyear, _ in dated]
+        self._by_year = [i for _, i in dated]
+        self._folded = tuple([record.wordform.lower()
+                              for record in self.records])
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def filter_wordclass(self, wordclass):
+        """
+        Return a new CandidateList, retaining only records of the
+        given wordclass
+        """
+        return CandidateList([record for record in self.records
+                              if record.wordclass == wordclass])
+
+    def refine(self, token, margin, sentence_start=False):
+        """
+        Return a list of the records whose lemma's first year is before
+        the margin (in frequency order); if there's more than one, prefer
+        those whose wordform matches the token (ignoring case if the token
+        is at the start of a sentence).
+        """
+        cutoff = bisect_left(self.firstyears, margin)
+        viable = sorted(self._by_year[:cutoff])
+        if len(viable) > 1:
+            if sentence_start:
+                token_low = token.lower()
+                matches = [i for i in viable if self._folded[i] == token_low]
+            else:
+                matches = [i for i in viable
+                           if self.records[i].wordform == token]
+            if matches:
+                viable = matches
+        return [self.records[i] for i in viable]
+
+
+EMPTY_CANDIDATES = CandidateList(())
+
+
+class LemmaRecord(LemmaBase):
+
+    """
+    Stands in for a Lemma object; supports the same methods
+    (to_list(), oed_identifier(), language_name(), etc.).
+    """
+
+    __slots__ = LEMMA_COLUMNS + ('language',)
+
+    def __init__(self, row, languages):
+        for column, value in zip(LEMMA_COLUMNS, row):
+            setattr(self, column, value)
+        self.wordclass = _intern(self.wordclass)
+        self.language = languages.get(self.language_id)
+
+    def __repr__(self):
+        return '<LemmaRecord: %s>' % self.__unicode__()
+
+    def language_record(self):
+        return self.language
+
+
+class LexiconIndex(object):
+
+    """
+    In-memory version of the lexicon tables
+    """
+
+    def __init__(self):
+        self._wordforms = {}
+        self._headwords = {}
+        self._alternates = {}
+
+    def __len__(self):
+        return len(self._wordforms)
+
+    def load(self):
+        languages = language_table()
+        lemmas = {}
+        for row in Lemma.objects.values_list(*LEMMA_COLUMNS).iterator():
+            record = LemmaRecord(row, languages)
+            lemmas[record.id] = record
+            # For each headword, keep only the most frequent lemma
+            #  (which is what we'd want for core words - see lemma_lookup())
+            try:
+                incumbent = self._headwords[record.lemma]
+            except KeyError:
+                self._headwords[record.lemma] = record
+            else:
+                if (record.f2000 or 0) > (incumbent.f2000 or 0):
+                    self._headwords[record.lemma] = record
+
+        # Wordforms are grouped by sort, and ordered by frequency (highest
+        #  first) - the same as the default ordering of the Wordform model.
+        wordforms = defaultdict(list)
+        qset = Wordform.objects.order_by('sort', '-f2000')
+        for row in qset.values_list(*WORDFORM_COLUMNS).iterator():
+            wordform, sort, wordclass, lemma_id, f2000, f1900, f1800 = row
+            wordforms[sort].append(WordformRecord(wordform,
+                                                  sort,
+                                                  _intern(wordclass),
+                                                  lemmas[lemma_id],
+                                                  f2000,
+                                                  f1900,
+                                                  f1800))
+        self._wordforms = {sort: CandidateList(records) for sort, records
+                           in wordforms.items()}
+
+        alternates = defaultdict(set)
+        qset = AlternateKey.objects.values_list('variant', 'target')
+        for variant, target in qset.iterator():
+            alternates[variant].add(_intern(target))
+        self._alternates = {variant: frozenset(targets) for variant, targets
+                            in alternates.items()}
+
+    def wordforms(self, sort):
+        """
+        Return a tuple of records for all the wordforms matching
+        a given sort (empty if there are none)
+        """
+        return self.candidates(sort).records
+
+    def candidates(self, sort):
+        """
+        Return a CandidateList of the wordforms matching a given sort
+        """
+        return self._wordforms.get(sort, EMPTY_CANDIDATES)
+
+    def top_lemma(self, headword):
+        """
+        Return the highest-frequency lemma record for a given
+        headword (or None)
+        """
+        return self._headwords.get(headword)
+
+    def alternates(self, sort):
+        """
+        Return the set of known sorts that this sort may be a variant of
+        (according to the alternate-key index)
+        """
+        return self._alternates.get(sort, frozenset())
+
+
+def lexicon_index():
+    """
+    Return the in-process lexicon index - or the memory-mapped lexicon
+    file, if the app is configured to use that instead (see
+    lexiconfile.py) - loading it if this has not yet been done.
+
+    Returns None if the app is configured to use neither
+    (in which case the caller should query the database instead).
+    """
+    global _index
+    if LEXICON_BACKEND not in ('index', 'file'):
+        return None
+    if _index is None:
+        with _lock:
+            if _index is None:
+                if LEXICON_BACKEND == 'file':
+                    from .lexiconfile import LexiconFile
+                    index = LexiconFile(LEXICON_FILE)
+                else:
+                    index = LexiconIndex()
+                    index.load()
+                _index = index
+    return _index
+
+
+def language_table():
+    """
+    Return an in-memory copy of the Language table: a dictionary mapping
+    each language ID to a LanguageRecord (with its family, if any)
+    """
+    global _languages
+    if _languages is None:
+        languages = {}
+        for language_id, name, family_id in (Language.objects.values_list(
+                'id', 'name', 'family_id')):
+            languages[language_id] = (LanguageRecord(language_id, name),
+                                      family_id)
+        for record, family_id in languages.values():
+            if family_id is not None and family_id in languages:
+                record.family = languages[family_id][0]
+        _languages = {language_id: record for language_id, (record, _)
+                      in languages.items()}
+    return _languages
+
+
+def lexicon_version(check=False):
+    """
+    Return the version number of the lexicon tables (i.e. the ID of the
+    latest LexiconBuild record; 0 if there are none)
+
+    The version is re-read from the database at most every
+    LEXICON_VERSION_CHECK seconds (or straight away, if 'check' is set).
+    If it has changed since the lexicon was loaded in this process,
+    reload_lexicon() is called, so that the process doesn't go on using
+    (or caching results derived from) the previous build.
+    """
+    global _version, _version_checked
+    now = time.time()
+    if (_version is None or check or
+            now - _version_checked > LEXICON_VERSION_CHECK):
+        latest = LexiconBuild.objects.order_by('-id')\
+            .values_list('id', flat=True).first() or 0
+        if _version is not None and latest != _version:
+            reload_lexicon()
+        _version = latest
+        _version_checked = now
+    return _version
+
+
+def reload_lexicon():
+    """
+    Discard any in-process lexicon data, so that it gets reloaded from
+    the database tables (or the lexicon file). This should be called after
+    these have been rebuilt (see populate_lexicon_db in build/pipeline.py).
+    """
+    global _index, _version, _languages
+    with _lock:
+        previous = _index
+        _index = None
+        _version = None
+        _languages = None
+    # Unmap the old lexicon file (if that's what was in use), rather than
+    #  leaving it mapped until the garbage collector gets round to it
+    if previous is not None and LEXICON_BACKEND == 'file':
+        previous.close()
+    for hook in _reload_hooks:
+        hook()
+
+
+def register_reload_hook(function):
+    """
+    Register a function to be called whenever reload_lexicon() is run
+    (e.g. to clear a cache derived from the lexicon tables)
+    """
+    _reload_hooks.append(function)
+
+
+def _intern(text):
+    if text is None:
+        return None
+    return sys.intern(text)
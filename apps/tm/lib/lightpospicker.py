@@ -21,123 +21,237 @@ MODALS = {'can', 'will', 'shall', 'would', 'should', 'could', "'d",
           "'ll", 'not', "'n't"}
 
 
+# Wordclasses which the scoring rules (see _score_candidate()) refer to;
+#  any other wordclass always scores 0
+SCORED_WORDCLASSES = ('NN', 'NNS', 'JJ', 'RB', 'IN', 'VB', 'VBZ', 'VBD',
+                      'VBN', 'VBG', 'VBND')
+PARTICIPLES = {'VBN', 'VBND'}
+
+
 def light_pos_picker(token, candidates):
-    wordclasses = set([c.wordclass for c in candidates])
     if token.previous_token():
-        previous_token = token.previous_token().lower()
+        previous_class = _token_class(token.previous_token().lower())
     else:
-        previous_token = ''
+        previous_class = _token_class('')
     if token.next_token():
-        next_token = token.next_token().lower()
+        next_class = _token_class(token.next_token().lower())
     else:
-        next_token = ''
-
-    for c in candidates:
-        c.score = 0
-        if c.wordclass in ('NN', 'NNS', 'JJ'):
-            if previous_token in ARTICLES or previous_token == 'of':
-                c.score += 1
-
-        if c.wordclass in ('NN', 'NNS', 'JJ'):
-            if (next_token in ARTICLES or next_token in PRONOUNS or
-                    next_token in PRONOUNS3 or next_token in OBJECTS):
-                c.score -= 1
-
-        if c.wordclass in ('NN', 'NNS'):
-            if next_token in ('of', 'which'):
-                c.score += 1
-
-        if c.wordclass in ('NN',):
-            if next_token in ('is', 'was', 'has', 'had', 'did', 'does'):
-                c.score += 1
-
-        if c.wordclass in ('NNS',):
-            if next_token in ('are', 'were', 'have', 'had', 'did', 'do'):
-                c.score += 1
-
-        if c.wordclass in ('VB', 'VBZ', 'VBD', 'VBN', 'VBG', 'VBND'):
-            if (next_token in ARTICLES or
-                    next_token in AUXILIARIES or
-                    next_token in OBJECTS or
-                    next_token == "'s"):
-                c.score += 1
-
-        if c.wordclass in ('VB',):
-            if previous_token in PRONOUNS:
-                c.score += 1
-
-        if c.wordclass in ('VBZ',):
-            if previous_token in PRONOUNS3:
-                c.score += 1
-
-        if c.wordclass in ('VBD', 'VBND'):
-            if previous_token in PRONOUNS or previous_token in PRONOUNS3:
-                c.score += 1
-
-        if c.wordclass in ('VBN', 'VBG', 'VBND'):
-            if previous_token in AUXILIARIES:
-                c.score += 1
-
-        if c.wordclass in ('VBN', 'VBND'):
-            if previous_token in AUXILIARIES2:
-                c.score += 1
-            if next_token == 'by':
-                c.score += 0.5
-
-        if c.wordclass in ('VB',):
-            if previous_token == 'to' and next_token not in SENTENCE_ENDS:
-                c.score += 0.5
-
-        if c.wordclass in ('VB',):
-            if previous_token in MODALS:
-                c.score += 0.5
-
-        if c.wordclass in ('VB', 'VBZ', 'VBD', 'VBN', 'VBND'):
-            if previous_token in PREPOSITIONS:
-                c.score -= 1
-
-        if c.wordclass in ('VB', 'VBZ',):
-            if previous_token in "'s":
-                c.score -= 1
-
-        if c.wordclass in ('IN',):
-            if next_token in ARTICLES:
-                c.score += 1
-
-        if c.wordclass in ('JJ',):
-            if next_token in PREPOSITIONS or next_token == "'s":
-                c.score -= 1
-            if (next_token == 'by' and
-                    ('VBN' in wordclasses or 'VBND' in wordclasses)):
-                c.score -= 1
-
-            if previous_token in ADJ_QUALIFIERS:
-                c.score += 1
-            elif previous_token in ARTICLES and next_token in SENTENCE_ENDS:
-                c.score -= 1
-
-        if c.wordclass in ('VB', 'VBZ', 'VBD', 'VBN', 'VBND'):
-            if next_token == '-':
-                c.score -= 1
-
-        if c.wordclass in ('JJ', 'RB'):
-            if next_token in AUXILIARIES:
-                c.score -= 0.5
-            if next_token == '-':
-                c.score += 0.5
-
-    period = token.docperiod
-    candidates.sort(key=lambda c: c.__dict__[period], reverse=True)
-    candidates.sort(key=lambda c: c.score, reverse=True)
-    #_display_results(previous_token, token.token, next_token, candidates)
-    return candidates[0]
-
-
-def _display_results(previous_token, token, next_token, candidates):
+        next_class = _token_class('')
+
+    # Scores are kept alongside the candidates, rather than being set on the
+    #  candidates themselves, since candidates may be shared between lookups
+    scores = _context_scores(previous_class, next_class,
+                             tuple([c.wordclass for c in candidates]))
+
+    # The winner is the candidate with the highest score, or failing
+    #  that the highest frequency for the document period, or failing
+    #  that the first
+    period = token.context.period
+    winner = None
+    for score, candidate in zip(scores, candidates):
+        rank = (score, getattr(candidate, period))
+        if winner is None or rank > winner[0]:
+            winner = (rank, candidate)
+    return winner[1]
+
+
+def _context_scores(previous_class, next_class, wordclasses):
+    """
+    Return the scores for a sequence of candidate wordclasses, in the
+    context of the previous and next token classes (memoized)
+    """
+    key = (previous_class, next_class, wordclasses)
+    try:
+        return _context_memo[key]
+    except KeyError:
+        participle = not PARTICIPLES.isdisjoint(wordclasses)
+        scores = tuple([_SCORES.get((wordclass, previous_class, next_class,
+                                     participle), 0)
+                        for wordclass in wordclasses])
+        _context_memo[key] = scores
+        return scores
+
+
+def _token_class(token):
+    """
+    Return the class of a (lower-cased) previous or next token. Tokens
+    which none of the scoring rules refer to are all in class 0.
+    """
+    return _TOKEN_CLASSES.get(token, 0)
+
+
+def _score_candidate(wordclass, participle, previous_token, next_token):
+    """
+    Score a candidate according to how well its wordclass fits
+    the context (the previous and next tokens). participle is True
+    if any of the other candidates are past participles.
+
+    These rules are not run for each candidate; they're compiled into
+    the _SCORES table (see _compile_scores()).
+    """
+    score = 0
+    if wordclass in ('NN', 'NNS', 'JJ'):
+        if previous_token in ARTICLES or previous_token == 'of':
+            score += 1
+
+    if wordclass in ('NN', 'NNS', 'JJ'):
+        if (next_token in ARTICLES or next_token in PRONOUNS or
+                next_token in PRONOUNS3 or next_token in OBJECTS):
+            score -= 1
+
+    if wordclass in ('NN', 'NNS'):
+        if next_token in ('of', 'which'):
+            score += 1
+
+    if wordclass in ('NN',):
+        if next_token in ('is', 'was', 'has', 'had', 'did', 'does'):
+            score += 1
+
+    if wordclass in ('NNS',):
+        if next_token in ('are', 'were', 'have', 'had', 'did', 'do'):
+            score += 1
+
+    if wordclass in ('VB', 'VBZ', 'VBD', 'VBN', 'VBG', 'VBND'):
+        if (next_token in ARTICLES or
+                next_token in AUXILIARIES or
+                next_token in OBJECTS or
+                next_token == "'s"):
+            score += 1
+
+    if wordclass in ('VB',):
+        if previous_token in PRONOUNS:
+            score += 1
+
+    if wordclass in ('VBZ',):
+        if previous_token in PRONOUNS3:
+            score += 1
+
+    if wordclass in ('VBD', 'VBND'):
+        if previous_token in PRONOUNS or previous_token in PRONOUNS3:
+            score += 1
+
+    if wordclass in ('VBN', 'VBG', 'VBND'):
+        if previous_token in AUXILIARIES:
+            score += 1
+
+    if wordclass in ('VBN', 'VBND'):
+        if previous_token in AUXILIARIES2:
+            score += 1
+        if next_token == 'by':
+            score += 0.5
+
+    if wordclass in ('VB',):
+        if previous_token == 'to' and next_token not in SENTENCE_ENDS:
+            score += 0.5
+
+    if wordclass in ('VB',):
+        if previous_token in MODALS:
+            score += 0.5
+
+    if wordclass in ('VB', 'VBZ', 'VBD', 'VBN', 'VBND'):
+        if previous_token in PREPOSITIONS:
+            score -= 1
+
+    if wordclass in ('VB', 'VBZ',):
+        if previous_token in "'s":
+            score -= 1
+
+    if wordclass in ('IN',):
+        if next_token in ARTICLES:
+            score += 1
+
+    if wordclass in ('JJ',):
+        if next_token in PREPOSITIONS or next_token == "'s":
+            score -= 1
+        if next_token == 'by' and participle:
+            score -= 1
+
+        if previous_token in ADJ_QUALIFIERS:
+            score += 1
+        elif previous_token in ARTICLES and next_token in SENTENCE_ENDS:
+            score -= 1
+
+    if wordclass in ('VB', 'VBZ', 'VBD', 'VBN', 'VBND'):
+        if next_token == '-':
+            score -= 1
+
+    if wordclass in ('JJ', 'RB'):
+        if next_token in AUXILIARIES:
+            score -= 0.5
+        if next_token == '-':
+            score += 0.5
+
+    return score
+
+
+def _compile_scores():
+    """
+    Compile the scoring rules into a table of scores keyed by
+    (wordclass, previous token class, next token class, participle),
+    and a table mapping each token the rules refer to onto its class.
+
+    Tokens are in the same class if every test in the rules treats them
+    the same way (e.g. 'he' and 'she'), so a single member of each class
+    stands in for all of them. Only non-zero scores are kept.
+    """
+    # Every token that any of the rules test for; plus the empty token
+    #  (no previous/next token) and the substrings of "'s" (since
+    #  one rule tests whether the previous token is *in* "'s")
+    tokens = set().union(ARTICLES, PRONOUNS, PRONOUNS3, OBJECTS, AUXILIARIES,
+                         AUXILIARIES2, PREPOSITIONS, ADJ_QUALIFIERS,
+                         SENTENCE_ENDS, MODALS)
+    tokens.update(('of', 'which', 'is', 'was', 'has', 'had', 'did', 'does',
+                   'are', 'were', 'have', 'do', "'s", 'by', 'to', '-',
+                   '', "'", 's'))
+    # A token which none of the rules refer to, standing in for class 0
+    other = '\0'
+
+    # Each token's class is identified by its signature: the scores it
+    #  produces for each wordclass and each possible neighbour
+    neighbours = sorted(tokens) + [other]
+    def signature(token):
+        return tuple([(_score_candidate(wordclass, participle, token, n),
+                       _score_candidate(wordclass, participle, n, token))
+                      for wordclass in SCORED_WORDCLASSES
+                      for participle in (False, True)
+                      for n in neighbours])
+
+    signatures = {signature(other): 0}
+    members = {0: other}
+    classes = {}
+    for token in sorted(tokens):
+        sig = signature(token)
+        if sig not in signatures:
+            signatures[sig] = len(signatures)
+            members[signatures[sig]] = token
+        if signatures[sig]:
+            classes[token] = signatures[sig]
+
+    scores = {}
+    for wordclass in SCORED_WORDCLASSES:
+        for participle in (False, True):
+            for previous_class, previous_token in members.items():
+                for next_class, next_token in members.items():
+                    score = _score_candidate(wordclass, participle,
+                                             previous_token, next_token)
+                    if score:
+                        scores[(wordclass, previous_class, next_class,
+                                participle)] = score
+    return classes, scores
+
+
+def _display_results(previous_token, token, next_token, ranked):
     """
     Used for debugging only
     """
     print('-----------------------------------------------------')
     print('%s -> %s -> %s' % (previous_token, token, next_token))
-    for c in candidates:
-        print('\t%s\t%s\t%f\t%d' % (c.wordform, c.wordclass, c.f2000, c.score))
\ No newline at end of file
+    for score, c in ranked:
+        print('\t%s\t%s\t%f\t%d' % (c.wordform, c.wordclass, c.f2000, score))
+
+
+_TOKEN_CLASSES, _SCORES = _compile_scores()
+# Memo of the scores for each context (previous token class, next token
+#  class, candidate wordclasses); bounded by the number of distinct
+#  combinations of wordclasses in the lexicon
+_context_memo = {}
@@ -5,7 +5,8 @@ bigrams, trigrams, and 5-grams.
 
 from . import appsettings as local_settings
 from .lexicalsort import lexicalsort
-from .lemmalookup import lemma_lookup
+from .lemmalookup import lemma_lookup, maybe_resolvable
+from .compoundindex import compound_index
 
 CORE_WORDS = local_settings.CORE_WORDS
 CORE_VERBS = local_settings.CORE_VERBS
@@ -20,7 +21,13 @@ def check_for_open_bigram(token):
         return False
 
     hypothesis = token.token + ' ' + token.next_token()
-    results = _compound_lookup(hypothesis, token.docyear, strict=True)
+    # After an article, any noun will do (see below) - including a
+    #  solid one ('a black bird' -> 'blackbird')
+    after_article = bool(token.previous and
+                         token.previous.lower() in ('a', 'an', 'the'))
+    if not _possible_compound(hypothesis, solid=after_article):
+        return False
+    results = _compound_lookup(hypothesis, token.context.year, strict=True)
     if not results:
         return False
 
@@ -39,9 +46,7 @@ def check_for_open_bigram(token):
     elif (token.starts_sentence() and
             compound_lemma.lemma.capitalize() == hypothesis):
         allowed = True
-    elif (token.previous and
-            compound_lemma.wordclass in ('NN', 'NNS') and
-            token.previous.lower() in ('a', 'an', 'the')):
+    elif after_article and compound_lemma.wordclass in ('NN', 'NNS'):
         allowed = True
 
     if allowed:
@@ -60,7 +65,9 @@ def check_for_open_trigram(token):
 
     hypothesis = (token.previous_token() + ' ' + token.token + ' '
                   + token.next_token())
-    results = _compound_lookup(hypothesis, token.docyear, strict=True)
+    if not _possible_compound(hypothesis, solid=True):
+        return False
+    results = _compound_lookup(hypothesis, token.context.year, strict=True)
     if not results:
         return False
 
@@ -79,7 +86,9 @@ def check_for_hyphen_trigram(token):
         return False
 
     hypothesis = (token.previous_token() + '-' + token.next_token())
-    results = _compound_lookup(hypothesis, token.docyear, strict=False)
+    if not _possible_compound(hypothesis, solid=True):
+        return False
+    results = _compound_lookup(hypothesis, token.context.year, strict=False)
     if not results:
         return False
 
@@ -98,7 +107,9 @@ def check_for_hyphen_5gram(token):
 
     hypothesis = (token.previous.previous_token() + '-' + token.token +
                   '-' + token.next.next_token())
-    results = _compound_lookup(hypothesis, token.docyear, strict=False)
+    if not _possible_compound(hypothesis, solid=True):
+        return False
+    results = _compound_lookup(hypothesis, token.context.year, strict=False)
     if not results:
         return False
 
@@ -222,6 +233,26 @@ def _plausible_hyphen_5gram(token):
     return True
 
 
+def _possible_compound(hypothesis, solid=False):
+    """
+    Return False if the hypothesis definitely won't match anything in the
+    lexicon (so needn't be looked up); otherwise return True.
+
+    Hypotheses are checked against the compound index. But where the
+    caller would also accept a match on a solid wordform ('to-day' ->
+    'today', 'a black bird' -> 'blackbird'), or on one of lemma_lookup()'s
+    fallback rewrites, a hypothesis that's not in the compound index is
+    checked against the lexicon filter instead ('solid').
+    """
+    index = compound_index()
+    if index is None or index.matches(hypothesis):
+        return True
+    elif solid:
+        return maybe_resolvable(hypothesis, lexicalsort(hypothesis))
+    else:
+        return False
+
+
 def _compound_lookup(hypothesis, year, strict=True):
     candidates = lemma_lookup(hypothesis,
                               lexicalsort(hypothesis),
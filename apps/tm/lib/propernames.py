@@ -0,0 +1,98 @@
+"""
+find_proper_names - decide which of a document's tokens are proper
+names (setting each token's proper_name flag).
+
+The tests themselves are in Token.check_proper_name(). Most tokens are
+settled by the first test ('capitalization'); after that, only the
+tokens still unresolved are visited again. These are indexed by their
+verbatim and lower-cased forms, so that a resolution can be passed on
+to the other occurrences of the same form through the index, rather than
+by rescanning the whole document.
+"""
+
+from collections import defaultdict
+
+
+def find_proper_names(tokens, common_forms=None, proper_forms=None):
+    """
+    Set the proper_name flag on each token.
+
+    common_forms and proper_forms are (optionally) the sets of lower-cased
+    common forms and verbatim proper-name forms resolved in earlier
+    parts of the document (see tokenizer.stream_tokenizer()). These get
+    consulted, and then updated with the resolutions made here.
+    """
+    if common_forms is None:
+        common_forms = set()
+    if proper_forms is None:
+        proper_forms = set()
+
+    for token in tokens:
+        token.check_proper_name(method='capitalization')
+
+    # Collect the forms resolved so far, and index the tokens which
+    #  are still unresolved
+    common = set(common_forms)
+    proper = set(proper_forms)
+    names = []
+    unresolved = []
+    by_lower = defaultdict(list)
+    by_verbatim = defaultdict(list)
+    for token in tokens:
+        if token.proper_name is False:
+            common.add(token.lower())
+        elif token.proper_name is True:
+            proper.add(token.token_verbatim)
+            names.append(token)
+        else:
+            unresolved.append(token)
+            by_lower[token.lower()].append(token)
+            by_verbatim[token.token_verbatim].append(token)
+
+    # Tag words which match other words that have already been tagged
+    _propagate(by_lower, common.intersection(by_lower), False)
+    # Tag names which match other names that have already been tagged
+    _propagate(by_verbatim, proper.intersection(by_verbatim), True)
+
+    # (Tokens resolved by now are left in the list of unresolved tokens,
+    #  but check_proper_name() ignores them)
+    for token in unresolved:
+        token.check_proper_name(method='neighbours')
+    for token in unresolved:
+        token.check_proper_name(method='unambiguous')
+        token.check_proper_name(method='midsentence')
+
+    # Tag names which match other names that have already been tagged
+    #  (including those just resolved)
+    proper.update([t.token_verbatim for t in unresolved
+                   if t.proper_name is True])
+    _propagate(by_verbatim, proper.intersection(by_verbatim), True)
+
+    for token in unresolved:
+        token.check_proper_name(method='firstword')
+
+    for token in unresolved:
+        if token.proper_name is True:
+            names.append(token)
+        elif token.proper_name is False:
+            common.add(token.lower())
+    common_forms.update(common)
+    proper_forms.update([t.token_verbatim for t in names])
+
+    # Remove any lemma reference from tokens which have been identified as
+    #  proper names
+    for token in names:
+        token.nix_lemma()
+        token.token = token.token_verbatim
+    return tokens
+
+
+def _propagate(index, forms, value):
+    """
+    Set the proper_name flag of any unresolved token whose form (as
+    indexed) is one of the given forms
+    """
+    for form in forms:
+        for token in index[form]:
+            if token.proper_name is None:
+                token.proper_name = value
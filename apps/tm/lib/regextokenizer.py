@@ -0,0 +1,372 @@
+"""
+regextokenizer - single-pass alternative to the NLTK sentence and word
+tokenizers used by tokenizer.py (selected by the TOKENIZER_BACKEND
+setting).
+
+split_text() sweeps the text once with a compiled scanner, doing the
+spacer, hyphen and apostrophe handling of tokenizer() and the sentence
+and word splitting of NLTK's sent_tokenize() and word_tokenize() as it
+goes. It follows the same rules as the NLTK path - Punkt's boundary
+heuristics and the Treebank conventions for punctuation, quotes and
+contractions - so that for almost all text the two backends produce the
+same tokens. Run the tmtokenizerparity management command to list any
+differences over the canned texts (see build/test/tokenizerparity.py).
+"""
+
+import re
+
+from .utilities import (STOP_MASKER, APOSTROPHE_MASKER1, APOSTROPHE_MASKER2,
+                        APOSTROPHE_MASKER3)
+
+# Scanner for the whole text: each match is a line break, a hyphen used
+#  as a dash (' - ' or ',- '), a spacer (see tokenizer.SPACERS) or
+#  hyphen, or a chunk of anything else up to the next space, spacer or
+#  hyphen. (Whitespace is skipped over.)
+SCANNER = re.compile(r"""
+    (?P<newline>\n)
+    |(?P<dash>(?<=[ ,])-(?=[ ]))
+    |(?P<spacer>[\u2013\u2014\u201c\u201d\u2018/-])
+    |(?P<chunk>[^\s\u2013\u2014\u201c\u201d\u2018/-]+)
+""", re.VERBOSE)
+
+# Splits a chunk into punctuation and word pieces, following the
+#  Treebank conventions (as used by NLTK's word_tokenize())
+PUNCTUATION = (r'\u00ab\u201e\u201c\u2018;@#$%&\u2012-\u2015?!*\[\](){}<>'
+               r'\u00bb\u201d"')
+PIECES = re.compile(r"""
+    (?P<punc>`+|''|\.{2,}|[,:](?!\d)|[%(punctuation)s])
+    |(?P<word>(?:[^`'.,:%(punctuation)s]|'(?!')|\.(?!\.)|[,:](?=\d))+)
+""" % {'punctuation': PUNCTUATION}, re.VERBOSE)
+
+# Punkt's word tokenizer (see nltk.tokenize.punkt), used to examine the
+#  context of a potential sentence break
+PUNKT_NON_WORD = (r"(?:[)\";}\]\*:@\'\({\["
+                  r"\u2018\u2019\u201c\u201d\u00ab\u00bb!?])")
+PUNKT_MULTI_CHAR = r"(?:\-{2,}|\.{2,}|(?:\.\s){2,}\.)"
+PUNKT_WORD = re.compile(r"""(
+    %(MultiChar)s
+    |
+    (?=[^\(\"\`{\[:;&\#\*@\)}\]\-,])\S+?
+    (?=
+        \s|$|%(NonWord)s|%(MultiChar)s|
+        ,(?=$|\s|%(NonWord)s|%(MultiChar)s)
+    )
+    |
+    \S
+)""" % {'NonWord': PUNKT_NON_WORD, 'MultiChar': PUNKT_MULTI_CHAR},
+    re.UNICODE | re.VERBOSE)
+PUNKT_NUMBER = re.compile(r'^-?[\.,]?\d[\d,\.-]*\.?$')
+PUNKT_INITIAL = re.compile(r'[^\W\d]\.$')
+PUNKT_ELLIPSIS = re.compile(r'\.\.+$')
+PUNKT_PUNCTUATION = set(';:,.!?')
+
+SENTENCE_ENDS = re.compile(r'[.?!]')
+SENTENCE_END = set('.?!')
+# Characters which may follow a sentence-ending character directly
+#  (rather than after a space) in a potential sentence break
+NON_WORD = set(')";}]*:@\'({[!?\u2018\u2019\u201c\u201d\u00ab\u00bb')
+# Closing punctuation that gets moved back to the end of the previous
+#  sentence
+REALIGNED = set('"\')]}\u2018\u2019\u201c\u201d\u00ab\u00bb')
+# Punctuation that may follow a sentence-final period
+FINAL_CLOSERS = {']', ')', '}', '>', '"', "''", "'", '\u00bb', '\u201d'}
+
+# Abbreviations after which a period doesn't end a sentence (standing
+#  in for the abbreviations learned by NLTK's pre-trained Punkt model)
+ABBREVIATIONS = {'mr', 'mrs', 'ms', 'messrs', 'capt', 'dr', 'st', 'jr', 'sr',
+                 'vs', 'col', 'gen', 'lt', 'rev', 'revd', 'prof', 'e.g',
+                 'i.e', 'viz', 'cf'}
+
+# Contraction suffixes split off the end of a word
+CONTRACTIONS = re.compile(r"(?<=[^' ])('[sSmMdD]|'|'ll|'LL|'re|'RE|'ve|'VE|"
+                          r"n't|N'T)$")
+CONTRACTIONS_WHOLE = re.compile(r"(?i)\b(?:(can)(not)|(d)('ye)|(gim)(me)|"
+                                r"(gon)(na)|(got)(ta)|(lem)(me)|"
+                                r"(more)('n))\b|\b(wan)(na)$")
+LEADING_CONTRACTION = re.compile(r"(?i)'(?:re|ve|ll|m|t|s|d|n)\b")
+# Characters which become (or are preceded by) a space in the NLTK path
+SPACED = set(' \u2013\u2014\u201c\u201d\u2018/')
+SPACE_TRANSLATION = {ord(c): ' ' for c in '\u2013\u2014\u201c\u201d\u2018/-'}
+# Characters after which a double quote is an opening quote
+OPENERS = set(' \t([{<\u00ab\u201c\u2018\u201e`\u2013\u2014\u201d/-')
+
+
+def split_text(text, year):
+    """
+    Split the text into lines, each line into sentences, and each
+    sentence into words.
+
+    Returns a list of lines, each a list of (sentence, words) pairs
+    (the same as tokenizer.split_text()).
+    """
+    text = text.replace('\u2019', "'")
+    lines = []
+    items = []
+    for match in SCANNER.finditer(text + '\n'):
+        kind = match.lastgroup
+        if kind == 'newline':
+            if items:
+                lines.append(_split_line(text, items, year))
+                items = []
+        else:
+            items.append((kind, match.start(), match.end()))
+    return lines
+
+
+def _split_line(text, items, year):
+    masked = _masked_apostrophes(text, items[0][1], items[-1][2], year)
+    lines = []
+    for sentence in _sentences(text, items, True):
+        # As in word_tokenize(), each sentence may get split again (this
+        #  time without the masking of utilities.stop_masker()) before
+        #  it's split into words
+        words = []
+        for part in _sentences(text, sentence, False):
+            words.extend(_words(text, part, masked))
+        lines.append((text[sentence[0][1]:sentence[-1][2]], words))
+    return lines
+
+
+def _sentences(text, items, stop_masking):
+    """
+    Split a list of scanned items into sentences (lists of items)
+    """
+    items = list(items)
+    # Only chunks containing '.', '?' or '!' can end a sentence
+    candidates = [i for i, (kind, start, end) in enumerate(items) if
+                  kind == 'chunk' and SENTENCE_ENDS.search(text, start, end)]
+    sentences = []
+    first = 0
+    for i in candidates:
+        if i < first:
+            continue
+        next_item = items[i + 1] if i + 1 < len(items) else None
+        while True:
+            kind, start, end = items[i]
+            cut = _sentence_break(text, items[i], next_item, stop_masking)
+            if cut is None:
+                break
+            elif cut < end and not _realigned(text, cut, end):
+                # Break within the chunk; the rest of the chunk starts
+                #  the next sentence (and may contain a break of its own)
+                sentences.append(items[first:i] + [(kind, start, cut)])
+                items[i] = (kind, cut, end)
+                first = i
+            else:
+                last = i + 1
+                # Closing punctuation at the start of the next sentence
+                #  is moved back to the end of this one
+                if (cut == end and next_item is not None and
+                        _realigned(text, next_item[1], next_item[2])):
+                    last += 1
+                sentences.append(items[first:last])
+                first = last
+                break
+    if first < len(items):
+        sentences.append(items[first:])
+    return sentences
+
+
+def _sentence_break(text, item, next_item, stop_masking):
+    """
+    Return the position at which a sentence ends within the chunk (or
+    at its end), or None if it doesn't end a sentence
+    """
+    kind, start, end = item
+    # The last potential sentence ending in the chunk (as in Punkt,
+    #  only the last one counts)
+    for p in range(end - 1, start - 1, -1):
+        if text[p] in SENTENCE_END:
+            if p + 1 < end and text[p + 1] in NON_WORD:
+                after = text[p + 1]
+                break
+            elif p + 1 == end and next_item is not None:
+                after = ' ' + _next_word(text, next_item)
+                break
+    else:
+        return None
+
+    if (stop_masking and p + 1 == end and
+            _stop_masked(text, start, end, next_item)):
+        return None
+    if not _contains_sentence_break(text[start:p + 1] + after):
+        return None
+    return p + 1
+
+
+def _realigned(text, start, end):
+    return all(c in REALIGNED for c in text[start:end])
+
+
+def _next_word(text, item):
+    kind, start, end = item
+    if (kind == 'chunk' and text[start] == "'" and end > start + 1 and
+            _adjacent_apostrophe(text, start)):
+        return "'"
+    return text[start:end]
+
+
+def _stop_masked(text, start, end, next_item):
+    """
+    Return True if the period at the end of the chunk would be masked
+    by utilities.stop_masker()
+    """
+    if next_item is None or next_item[0] != 'chunk' or \
+            next_item[1] != end + 1 or text[end] != ' ':
+        return False
+    match = STOP_MASKER.search(text, max(start - 1, 0), next_item[2])
+    return match is not None and match.end(1) == end - 1
+
+
+def _contains_sentence_break(context):
+    """
+    Return True if Punkt would find a sentence break within the context
+    (the word containing the potential sentence ending, plus whatever
+    follows it)
+    """
+    words = PUNKT_WORD.findall(context)
+    for word, next_word in zip(words, words[1:]):
+        if _punkt_sentbreak(word, next_word):
+            return True
+    return False
+
+
+def _punkt_sentbreak(word, next_word):
+    if word in SENTENCE_END:
+        return True
+    if not word.endswith('.') or PUNKT_ELLIPSIS.match(word) or \
+            word.endswith('..'):
+        return False
+    stem = word[:-1].lower()
+    if stem in ABBREVIATIONS or stem.split('-')[-1] in ABBREVIATIONS:
+        return False
+    if PUNKT_INITIAL.match(word) or PUNKT_NUMBER.match(word.lower()):
+        # Orthographic heuristic: a following lower-case word or
+        #  punctuation mark means this isn't a sentence break. (So does
+        #  a following capitalized word, after an initial.)
+        if next_word in PUNKT_PUNCTUATION or next_word[0].islower():
+            return False
+        if PUNKT_INITIAL.match(word) and next_word[0].isupper():
+            return False
+    return True
+
+
+def _words(text, sentence, masked):
+    """
+    Split a sentence (a list of scanned items) into words
+    """
+    pieces = []
+    for kind, start, end in sentence:
+        if kind == 'dash':
+            pieces.append(('punc', '\u2013', start, end))
+        elif kind == 'spacer':
+            pieces.append(('punc', text[start:end], start, end))
+        else:
+            for match in PIECES.finditer(text, start, end):
+                pieces.append((match.lastgroup, match.group(),
+                               match.start(), match.end()))
+
+    # Find the sentence-final word (ignoring any closing punctuation
+    #  that follows it)
+    final = len(pieces) - 1
+    while final >= 0 and pieces[final][1] in FINAL_CLOSERS:
+        final -= 1
+
+    sentence_start = sentence[0][1]
+    words = []
+    for i, (kind, piece, start, end) in enumerate(pieces):
+        if kind == 'punc':
+            if piece == '"' or piece == "''":
+                if start == sentence_start or text[start - 1] in OPENERS:
+                    piece = '``'
+                else:
+                    piece = "''"
+            words.append(piece)
+            continue
+
+        # A sentence-final period (and any apostrophes following it)
+        #  gets split off
+        closers = []
+        if i == final:
+            core = piece.rstrip("'")
+            if core.endswith('.') and not core.endswith('..'):
+                closers.append('.')
+                if len(piece) - len(core) == 1:
+                    closers.append("'")
+                elif len(piece) > len(core):
+                    closers.append("''")
+                piece = core[:-1]
+                end = start + len(piece)
+
+        # Leading apostrophe
+        if piece.startswith("'") and len(piece) > 1:
+            if ord(piece[1]) < 128 and piece[1].isalpha() and \
+                    _adjacent_apostrophe(text, start):
+                split = True
+            else:
+                split = ((piece[1].isalnum() or piece[1] == '_') and
+                         not LEADING_CONTRACTION.match(piece))
+            if split:
+                words.append("'")
+                piece = piece[1:]
+                start += 1
+
+        if "'" in piece or CONTRACTIONS_WHOLE.search(piece):
+            words.extend(_split_contractions(piece, end, masked))
+        elif piece:
+            words.append(piece)
+        words.extend(closers)
+    return words
+
+
+def _split_contractions(word, end, masked):
+    # (Except where the final apostrophe is masked)
+    if "'" in word and end - 1 not in masked and end - 2 not in masked:
+        match = CONTRACTIONS.search(word)
+        if match and match.start() > 0:
+            stem = word[:match.start()]
+            return _split_whole_contractions(stem) + [match.group()]
+    return _split_whole_contractions(word)
+
+
+def _split_whole_contractions(word):
+    match = CONTRACTIONS_WHOLE.search(word)
+    if match:
+        parts = [word[:match.start()]] + list(match.groups()) + \
+            [word[match.end():]]
+        return [z for z in parts if z]
+    return [word]
+
+
+def _masked_apostrophes(text, start, end, year):
+    """
+    Return the positions of the apostrophes in the line that would be
+    masked by utilities.apostrophe_masker() (archaic 'd, and dropped-g
+    in'), so don't get split off
+    """
+    masked = set()
+    if 1900 <= year <= 1950:
+        return masked
+    # Spacers and hyphens are spaced out in the NLTK path, so are
+    #  equivalent to spaces here
+    line = text[start:end].translate(SPACE_TRANSLATION)
+    if year < 1900:
+        for match in APOSTROPHE_MASKER1.finditer(line):
+            masked.add(start + match.end(1))
+    else:
+        for match in APOSTROPHE_MASKER2.finditer(line):
+            masked.add(start + match.end(1) + 2)
+        for match in APOSTROPHE_MASKER3.finditer(line):
+            masked.add(start + match.end(2) + 2)
+    return masked
+
+
+def _adjacent_apostrophe(text, position):
+    """
+    Return True if the apostrophe at this position is one that
+    tokenizer.ADJACENT_APOSTROPHE would space out from the following
+    word (i.e. it's at the start of the text, or after a space, spacer
+    or open bracket)
+    """
+    return position == 0 or text[position - 1] in SPACED or \
+        text[position - 1] == '('
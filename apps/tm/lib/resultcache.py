@@ -0,0 +1,72 @@
+"""
+ResultCache - bounded, thread-safe LRU cache for lookup results.
+
+Intended to be shared across requests within a worker process, so values
+stored in it should be immutable (e.g. tuples of records).
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ResultCache(object):
+
+    """
+    Least-recently-used cache holding at most maxsize entries, with
+    hit/miss/eviction counters
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+        Return the value cached for this key (marking it as recently
+        used), or the default if the key is not cached
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Cache a value for this key, evicting the least-recently-used
+        entry if the cache is full
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        Return a dictionary of the cache's counters
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize}
@@ -0,0 +1,65 @@
+"""
+resultspayload - the results for a document (the lemmas and tokens
+datastructs produced by TextManager) rearranged as parallel arrays
+(columns) rather than as one list per token or lemma.
+
+This is what the results data endpoints serve (see views.results_data()):
+columns of repetitive values compress much better than rows, and the
+client can walk them without unpacking each row. Columns of short
+repeated strings (token status, wordclass, language) are dictionary-
+encoded: the values are listed once, and the column holds indexes into
+the list.
+
+See uncompressResults() in static/tm/js/viewresults.js for the client side.
+"""
+
+import json
+
+# Position of each field in a lemma row (see LemmaBase.to_list())
+LEMMA_FIELDS = ('id', 'url', 'lemma', 'sort', 'year', 'language', 'family',
+                'count', 'definition', 'thesaurus')
+FREQUENCY_PERIODS = ('f1750', 'f1800', 'f1850', 'f1900', 'f1950', 'f2000')
+DICTIONARY_ENCODED = ('language', 'family')
+
+
+def columnar_payload(lemmas, tokens):
+    """
+    Return the columnar payload (as a JSON string) for the lemmas and
+    tokens datastructs, as returned by TextManager.lemmas_datastruct()
+    and TextManager.tokens_datastruct() (or stored as JSON in the
+    Document table)
+    """
+    lemma_columns = {}
+    for i, field in enumerate(LEMMA_FIELDS):
+        column = [row[i] for row in lemmas]
+        if field in DICTIONARY_ENCODED:
+            lemma_columns[field] = _dictionary_encoded(column)
+        else:
+            lemma_columns[field] = column
+    offset = len(LEMMA_FIELDS)
+    lemma_columns['frequency'] = [[row[offset + i] for row in lemmas]
+                                  for i, _ in enumerate(FREQUENCY_PERIODS)]
+
+    token_columns = {
+        'text': [row[0] for row in tokens],
+        'status': _dictionary_encoded([row[1] for row in tokens]),
+        'space': [row[2] for row in tokens],
+        # Tokens which are not in the OED have no lemma (-1) and no
+        #  wordclass (None)
+        'lemma': [row[3] if len(row) > 3 else -1 for row in tokens],
+        'wordclass': _dictionary_encoded([row[4] if len(row) > 4 else None
+                                          for row in tokens]),
+    }
+
+    payload = {'lemmas': lemma_columns, 'tokens': token_columns}
+    return json.dumps(payload, separators=(',', ':'))
+
+
+def _dictionary_encoded(column):
+    """
+    Return the column as {'values': [distinct values], 'codes': [index
+    of each value in the list of distinct values]}
+    """
+    values = {}
+    codes = [values.setdefault(value, len(values)) for value in column]
+    return {'values': sorted(values, key=values.get), 'codes': codes}
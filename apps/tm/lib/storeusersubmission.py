@@ -1,11 +1,25 @@
+"""
+Store user-submitted documents (as UserSubmission records), along with
+the results of analysing them.
+
+The stored results are only good for the lexicon they were computed
+against, so each record notes the lexicon version. Results for an
+earlier version get recomputed when next requested (stored_results()),
+or all at once after the lexicon has been rebuilt
+(refresh_user_submissions(), run as part of the build pipeline).
+"""
 
 import random
 import string
 
 from ..models import UserSubmission
+from .textmanager import TextManager
+from .lexiconindex import lexicon_version
 
 charset = string.ascii_lowercase + string.digits
 
+ANALYSIS_FIELDS = ['lemmas', 'tokens', 'lexicon_version']
+
 
 def store_user_submission(post):
     record = UserSubmission(identifier=random_identifier(6),
@@ -13,10 +27,48 @@ def store_user_submission(post):
                             title=post['title'],
                             year=post['year'],
                             text=post['text'])
+    analyse_submission(record)
     record.save()
     return record
 
 
+def analyse_submission(record):
+    """
+    Analyse the text of a UserSubmission record, and set its lemmas,
+    tokens, and lexicon_version fields (doesn't save the record)
+    """
+    tm = TextManager(record.text, record.year)
+    record.lemmas = tm.lemmas_datastruct(formalism='json')
+    record.tokens = tm.tokens_datastruct(formalism='json')
+    record.lexicon_version = lexicon_version()
+
+
+def stored_results(record):
+    """
+    Return the lemmas and tokens datastructs (as JSON) for a
+    UserSubmission record, recomputing them first if they were
+    computed against an earlier version of the lexicon (or never).
+    """
+    if record.lexicon_version != lexicon_version() or record.lemmas is None:
+        analyse_submission(record)
+        record.save(update_fields=ANALYSIS_FIELDS)
+    return record.lemmas, record.tokens
+
+
+def refresh_user_submissions():
+    """
+    Recompute the results for any UserSubmission records that are out
+    of date with the current version of the lexicon
+    """
+    version = lexicon_version()
+    # (NULL versions - records stored before results were kept - are
+    #  included by exclude())
+    stale = UserSubmission.objects.exclude(lexicon_version=version)
+    for record in stale.defer('lemmas', 'tokens').iterator():
+        analyse_submission(record)
+        record.save(update_fields=ANALYSIS_FIELDS)
+
+
 def random_identifier(length):
     """
     Return a string of random characters, of a given length.
@@ -0,0 +1,111 @@
+"""
+StreamingTextManager - analyse a book-length text paragraph by paragraph,
+keeping only running aggregates in memory (rather than every token of
+the document, as TextManager does).
+
+Usage:
+    stm = StreamingTextManager(year)
+    with open(filepath) as filehandle:
+        for tokens in stm.analyse(iterate_paragraphs(filehandle)):
+            rows = stm.tokens_datastruct(tokens)
+            ...
+    stats = stm.profile_stats()
+    lemmas = stm.lemmas_datastruct()
+
+Note that proper names are resolved using only what has been seen so
+far in the document (see tokenizer.stream_tokenizer()), so results can
+differ slightly from those of TextManager for the same text.
+"""
+
+import json
+
+from django.utils.text import normalize_newlines
+
+from .tokenizer import stream_tokenizer
+from .lemmacollection import LemmaCollection
+from .textmanager import DocumentStats
+
+
+class StreamingTextManager(DocumentStats):
+
+    def __init__(self, year):
+        self.year = year
+        self.lemmas = LemmaCollection()
+        self._num_tokens = 0
+        self._num_words = 0
+        self._word_length_total = 0
+
+    def analyse(self, paragraphs):
+        """
+        Consume an iterable of paragraphs; yield the list of tokens for
+        each paragraph in turn (with lemmas and proper names resolved).
+
+        The running aggregates are updated as each paragraph is
+        yielded, so profile_stats() and lemmas_datastruct() are only
+        complete once the generator has been exhausted.
+        """
+        paragraphs = (normalize_newlines(p) for p in paragraphs)
+        for tokens in stream_tokenizer(paragraphs, self.year):
+            self.lemmas.add_tokens(tokens)
+            self._num_tokens += len(tokens)
+            for token in tokens:
+                if token.is_wordlike():
+                    self._num_words += 1
+                    self._word_length_total += len(token.token)
+            yield tokens
+
+    def tokens_datastruct(self, tokens, **kwargs):
+        """
+        Return the datastruct for a paragraph's tokens (as yielded by
+        analyse()). As in TextManager.tokens_datastruct(), tokens in
+        the OED point to their lemmas by index position; but here the
+        positions are in lemmas_datastruct() order (order of first
+        appearance), since document frequencies aren't known yet.
+        """
+        datastruct = []
+        for token in tokens:
+            data = token.to_list()
+            if token.is_in_oed():
+                data.append(self.lemmas.position(token.oed_identifier()))
+                data.append(token.wordclass)
+            datastruct.append(data)
+        if kwargs.get('formalism') == 'json':
+            return json.dumps(datastruct)
+        else:
+            return datastruct
+
+    def lemmas_datastruct(self, **kwargs):
+        """
+        Return the datastruct for the lemmas found so far, in order of
+        first appearance
+        """
+        datastruct = [lemma.to_list(self.lemmas.token_count(lemma))
+                      for lemma in self.lemmas.lemmas()]
+        if kwargs.get('formalism') == 'json':
+            return json.dumps(datastruct)
+        else:
+            return datastruct
+
+    def num_tokens(self):
+        return self._num_tokens
+
+    def num_words(self):
+        return self._num_words
+
+    def word_length_total(self):
+        return self._word_length_total
+
+
+def iterate_paragraphs(filehandle):
+    """
+    Yield paragraphs (runs of non-blank lines) from a text file
+    """
+    lines = []
+    for line in filehandle:
+        if line.strip():
+            lines.append(line.rstrip('\n'))
+        elif lines:
+            yield '\n'.join(lines)
+            lines = []
+    if lines:
+        yield '\n'.join(lines)
@@ -5,15 +5,65 @@ import json
 from django.utils.text import normalize_newlines
 
 from .tokenizer import tokenizer
-from .token import Token
 
 
-class TextManager(object):
+class DocumentStats(object):
 
-    def __init__(self, text, year):
-        Token.clear_cache()
+    """
+    Profile statistics for a document. Subclasses provide the
+    LemmaCollection (as self.lemmas), num_words() and word_length_total().
+    """
+
+    def language_ratio(self, family):
+        """
+        Return the ratio of words from given language family
+        (Germanic or Romance)
+        """
+        if family.lower() == 'romance':
+            langs = set(('Latin', 'Romance'))
+        elif family.lower() == 'germanic':
+            langs = set(('Germanic',))
+        else:
+            langs = set()
+        count = sum([self.lemmas.token_count(lemma)
+                     for lemma in self.lemmas.lemmas()
+                     if lemma.language_family() in langs])
+        return count / self.num_words()
+
+    def average_word_length(self):
+        """
+        Return the mean average word length
+        """
+        return self.word_length_total() / self.num_words()
+
+    def cumulative_ratio(self, year):
+        """
+        Return the ratio of words that existed at a given date
+        """
+        count = sum([self.lemmas.token_count(lemma)
+                     for lemma in self.lemmas.lemmas()
+                     if lemma.firstyear <= year])
+        return count / self.num_words()
+
+    def profile_stats(self):
+        try:
+            return self._profile_stats
+        except AttributeError:
+            self._profile_stats = {
+                'germanic': self.language_ratio('Germanic'),
+                'romance': self.language_ratio('Romance'),
+                'wordlength': self.average_word_length(),
+                'r1200': self.cumulative_ratio(1200),
+                'r1500': self.cumulative_ratio(1500),
+            }
+            return self._profile_stats
+
+
+class TextManager(DocumentStats):
+
+    def __init__(self, text, year, workers=None):
         self.text = normalize_newlines(text)
-        self.tokens, self.lemmas = tokenizer(self.text, year)
+        self.tokens, self.lemmas = tokenizer(self.text, year, workers=workers)
 
     def teaser(self, length=50):
         clean = self.text.replace('\t', ' ').replace('\n', ' ').strip()
@@ -70,49 +120,9 @@ class TextManager(object):
             self._num_words = len([t for t in self.tokens if t.is_wordlike()])
             return self._num_words
 
-    def language_ratio(self, family):
-        """
-        Return the ratio of words from given language family
-        (Germanic or Romance)
-        """
-        if family.lower() == 'romance':
-            langs = set(('Latin', 'Romance'))
-        elif family.lower() == 'germanic':
-            langs = set(('Germanic',))
-        else:
-            langs = set()
-        count = sum([lemma.token_count() for lemma in self.lemmas.lemmas()
-                     if lemma.language_family() in langs])
-        return count / self.num_words()
-
-    def average_word_length(self):
-        """
-        Return the mean average word length
-        """
-        total = sum([len(token.token) for token in self.tokens
-                     if token.is_wordlike()])
-        return total / self.num_words()
-
-    def cumulative_ratio(self, year):
-        """
-        Return the ratio of words that existed at a given date
-        """
-        count = sum([lemma.token_count() for lemma in self.lemmas.lemmas()
-                     if lemma.firstyear <= year])
-        return count / self.num_words()
-
-    def profile_stats(self):
-        try:
-            return self._profile_stats
-        except AttributeError:
-            self._profile_stats = {
-                'germanic': self.language_ratio('Germanic'),
-                'romance': self.language_ratio('Romance'),
-                'wordlength': self.average_word_length(),
-                'r1200': self.cumulative_ratio(1200),
-                'r1500': self.cumulative_ratio(1500),
-            }
-            return self._profile_stats
+    def word_length_total(self):
+        return sum([len(token.token) for token in self.tokens
+                    if token.is_wordlike()])
 
     #=============================================================
     # The following functions are not strictly needed by the
@@ -0,0 +1,47 @@
+"""
+thesauruslookup - fetch the data for a batch of thesaurus classes (with
+their instances), as returned to the thesaurus popup.
+
+The data for each class is cached in-process, since it only changes
+when the thesaurus tables are rebuilt.
+"""
+
+from . import appsettings as local_settings
+from ..htmodels import ThesaurusClass
+from .resultcache import ResultCache
+
+_class_cache = ResultCache(local_settings.THESAURUS_CACHE_SIZE)
+
+
+def thesaurus_records(class_ids):
+    """
+    Return a list of ThesaurusClass.to_dict() dictionaries for the given
+    class IDs (in the same order); any IDs which are not found are omitted.
+
+    Classes which are not already cached are fetched, together with their
+    instances, in a couple of queries.
+    """
+    records = {}
+    for class_id in set(class_ids):
+        record = _class_cache.get(class_id)
+        if record is not None:
+            records[class_id] = record
+
+    missing = [class_id for class_id in set(class_ids)
+               if class_id not in records]
+    if missing:
+        qset = (ThesaurusClass.objects.filter(id__in=missing)
+                .prefetch_related('thesaurusinstance_set'))
+        for thesclass in qset:
+            records[thesclass.id] = thesclass.to_dict()
+            _class_cache.set(thesclass.id, records[thesclass.id])
+
+    return [records[class_id] for class_id in class_ids
+            if class_id in records]
+
+
+def cache_stats():
+    """
+    Return hit/miss/eviction counters for the class cache
+    """
+    return _class_cache.stats()
@@ -1,9 +1,9 @@
 
 from . import appsettings as local_settings
-from ..models import ProperName
 from .lexicalsort import lexicalsort
+from .gazetteer import gazetteer
 from .utilities import json_safe, apostrophe_unmasker
-from .lemmalookup import lemma_lookup
+from .lemmalookup import lemma_lookup, lookup_keys
 from .lightpospicker import light_pos_picker
 
 CORE_WORDS = local_settings.CORE_WORDS
@@ -20,40 +20,155 @@ CLOSING_PUNCTUATION = local_settings.CLOSING_PUNCTUATION
 UNSPACED = set(('(', '[', '\u201c', '/', '-')) # no space before these
 
 
+class TokenTable(object):
+
+    """
+    The tokens of a sentence, with the links between neighbouring
+    tokens held as indices into the table (rather than as pointers on
+    each token).
+
+    Tokens marked for disposal (see Token.omit_next()) keep their place
+    until commit() unlinks them, so that a token's neighbours don't
+    change in the middle of a pass over the sentence.
+    """
+
+    __slots__ = ('tokens', 'first_index', 'last_index', '_previous',
+                 '_next', '_skip', '_pending')
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.first_index = 0 if tokens else -1
+        self.last_index = len(tokens) - 1
+        self._previous = list(range(-1, len(tokens) - 1))
+        self._next = list(range(1, len(tokens) + 1))
+        if tokens:
+            self._next[-1] = -1
+        self._skip = [False] * len(tokens)
+        self._pending = []
+        for i, token in enumerate(tokens):
+            token.table = self
+            token.index = i
+
+    def previous(self, index):
+        i = self._previous[index]
+        if i < 0:
+            return None
+        return self.tokens[i]
+
+    def next(self, index):
+        i = self._next[index]
+        if i < 0:
+            return None
+        return self.tokens[i]
+
+    def is_skipped(self, index):
+        return self._skip[index]
+
+    def omit(self, index):
+        """
+        Mark a token for disposal
+        """
+        if not self._skip[index]:
+            self._skip[index] = True
+            self._pending.append(index)
+
+    def commit(self):
+        """
+        Unlink the tokens marked for disposal since the last commit, and
+        return the list of remaining tokens
+        """
+        for i in self._pending:
+            previous, next = self._previous[i], self._next[i]
+            if previous < 0:
+                self.first_index = next
+            else:
+                self._next[previous] = next
+            if next < 0:
+                self.last_index = previous
+            else:
+                self._previous[next] = previous
+        self._pending = []
+        return [t for t, skip in zip(self.tokens, self._skip) if not skip]
+
+
 class Token(object):
 
-    lemma_cache = {}
-    docyear = None
-    docperiod = None
+    __slots__ = ('token_verbatim', 'token', 'sentence', 'context', 'table',
+                 'index', 'proper_name', 'newline', 'count',
+                 'propername_test', 'wordclass', 'compound_candidates',
+                 '_is_wordlike', '_lemma_manager')
 
-    def __init__(self, token, sentence):
+    def __init__(self, token, sentence, context):
         self.token_verbatim = _token_cleanup(token)
-        self.token = _token_adjusted(self.token_verbatim, self.docyear)
+        self.token = _token_adjusted(self.token_verbatim, context.year)
         self.sentence = sentence
+        self.context = context  # The document's AnalysisContext
 
-        self.first = False  # Is this the first token in its sentence?
-        self.last = False  # Is this the last token in its sentence?
-        self.previous = None  # The preceding token
-        self.next = None  # The following token
+        self.table = None  # The TokenTable for the token's sentence
+        self.index = None  # The token's position in the table
         self.proper_name = None  # Is this a proper name?
         self.newline = False  # Does this token start a new line?
         self.count = 0  # Occurrences of the token's lemma (gets set later)
-        self.skip = False
         self.propername_test = None
         self.wordclass = None
 
-    @classmethod
-    def clear_cache(cls):
-        cls.lemma_cache = {}
+    @property
+    def first(self):
+        """
+        Is this the first token in its sentence?
+        """
+        return self.table is not None and self.table.first_index == self.index
+
+    @property
+    def last(self):
+        """
+        Is this the last token in its sentence?
+        """
+        return self.table is not None and self.table.last_index == self.index
+
+    @property
+    def previous(self):
+        """
+        The preceding token (or None)
+        """
+        if self.table is None:
+            return None
+        return self.table.previous(self.index)
+
+    @property
+    def next(self):
+        """
+        The following token (or None)
+        """
+        if self.table is None:
+            return None
+        return self.table.next(self.index)
+
+    @property
+    def skip(self):
+        """
+        Has this token been marked for disposal?
+        """
+        return self.table is not None and self.table.is_skipped(self.index)
 
     @classmethod
-    def set_year(cls, year):
-        cls.docyear = year
-        periods = []
-        for p in (1800, 1900, 2000):
-            periods.append((p, abs(p - year)))
-        periods.sort(key=lambda p: p[1])
-        cls.docperiod = 'f%d' % periods[0][0]
+    def restore(cls, state, sentence, context):
+        """
+        Return a new token from a snapshot returned by state()
+        """
+        token = cls('', sentence, context)
+        (token.token_verbatim, token.token, token.wordclass,
+         token._is_wordlike, lemma) = state
+        token.reset_lemma(lemma)
+        return token
+
+    def state(self):
+        """
+        Return a snapshot of the token as it stands after lemmatization
+        (see tokenizer._lemmatize_text())
+        """
+        return (self.token_verbatim, self.token, self.wordclass,
+                self.is_wordlike(), self.lemma_manager())
 
     def lower(self):
         return self.token.lower()
@@ -195,14 +310,14 @@ class Token(object):
                 self.next.proper_name = True
 
         elif method == 'unambiguous':
-            qset = ProperName.objects.filter(sort=self.lexical_sort(),
-                                             lemma=self.token_verbatim)
-            if qset.exists() and qset.first().common:
+            common = gazetteer().lookup(self.lexical_sort(),
+                                        self.token_verbatim)
+            if common:
                 self.proper_name = True
-            elif not qset.exists():
+            elif common is None:
                 self.proper_name = False
             else:
-                self.propername_test = qset.first().lemma
+                self.propername_test = self.token_verbatim
 
         elif method == 'midsentence' and not self.starts_sentence():
             if self.lemma_manager() and self.lemma_manager().lemma.istitle():
@@ -231,19 +346,17 @@ class Token(object):
 
     def omit_previous(self):
         """
-        Mark the previous token for disposal; and move the 'previous'
-        pointer back to the preceding token (in any).
+        Mark the previous token for disposal (see TokenTable.commit())
         """
         if self.previous:
-            self.previous.skip = True
+            self.table.omit(self.previous.index)
 
     def omit_next(self):
         """
-        Mark the next token for disposal; and move the 'next'
-        pointer forward to the following token (in any).
+        Mark the next token for disposal (see TokenTable.commit())
         """
         if self.next:
-            self.next.skip = True
+            self.table.omit(self.next.index)
 
     def _is_proper_bigram(self):
         if (self.next_token() in PROPER_NAME_ENDS and
@@ -304,16 +417,12 @@ class Token(object):
 
     def find_lemma(self):
         if self.is_wordlike() and not self.is_prefix():
-            try:
-                Token.lemma_cache[self.lower()]
-            except KeyError:
-                qset = lemma_lookup(self.token,
-                                    self.lexical_sort(),
-                                    self.docyear,
-                                    sentence_start=self.starts_sentence())
-                Token.lemma_cache[self.lower()] = qset
-
-            candidates = Token.lemma_cache[self.lower()]
+            # (Results are cached across documents by lemma_lookup())
+            candidates = lemma_lookup(self.token,
+                                      self.lexical_sort(),
+                                      self.context.year,
+                                      sentence_start=self.starts_sentence(),
+                                      prefetched=self.context.prefetched)
             if len(candidates) == 1:
                 self.reset_lemma(candidates[0].lemma)
                 self.token = candidates[0].wordform
@@ -328,6 +437,16 @@ class Token(object):
         else:
             self.reset_lemma(None)
 
+    def lookup_keys(self):
+        """
+        Return the set of sorts that find_lemma() may need to look up
+        """
+        if self.is_wordlike():
+            return lookup_keys(self.token, self.lexical_sort(),
+                               self.context.year)
+        else:
+            return set()
+
     def pick_candidate_by_pos(self, candidates):
         return light_pos_picker(self, candidates)
 
@@ -1,24 +1,247 @@
 
 import re
+import hashlib
 
 from nltk.tokenize import word_tokenize, sent_tokenize
-from .token import Token
+from .token import Token, TokenTable
+from .analysiscontext import AnalysisContext
 from .lemmacollection import LemmaCollection
+from .propernames import find_proper_names
+from .lemmalookup import prefetch_wordforms
+from .lexiconindex import lexicon_version, register_reload_hook
+from .resultcache import ResultCache
+from .analysispool import map_chunks
 from .opencompounds import (check_for_open_bigram,
                             check_for_open_trigram,
                             check_for_hyphen_trigram,
                             check_for_hyphen_5gram)
+from .regextokenizer import split_text as regex_split_text
 from .utilities import apostrophe_masker, stop_masker, stop_unmasker
+from . import appsettings as local_settings
+
+TOKENIZER_BACKEND = local_settings.TOKENIZER_BACKEND
+LINE_CACHE_SIZE = local_settings.LINE_CACHE_SIZE
+ANALYSIS_WORKERS = local_settings.ANALYSIS_WORKERS
+PARALLEL_MIN_LINES = local_settings.PARALLEL_MIN_LINES
 
 
 # We need to space these out, because the tokenizer does not do so
 SPACERS = ('\u2013', '\u2014', '\u201c', '\u201d', '\u2018', '/')
 ADJACENT_APOSTROPHE = re.compile(r"(^'| '|\(')([a-zA-Z])")
 
+# Lemmatized lines of text, shared by all requests handled by this
+#  process (see _lemmatize_text())
+_line_cache = ResultCache(LINE_CACHE_SIZE)
+
+
+def tokenizer(text, year, workers=None):
+    context = AnalysisContext(year)
+    if workers is None:
+        workers = ANALYSIS_WORKERS
+
+    #-----------------------------------------------
+    # Clean-up, lineation, tokenization and lemmatization
+    #
+    # (For a long text, this may be farmed out to a pool of
+    #  worker processes - see _lemmatize_text().)
+    #-----------------------------------------------
+    tokens = _lemmatize_text(text, context, workers)
+
+    #-----------------------------------------------
+    # Figure out which tokens are proper names
+    #
+    # (We do this *after* concatenating all the tokens together,
+    #  rather than doing it sentence by sentence,
+    #  so that we can take advantage of information across the
+    #  whole text. For example, an unambiguous proper name in one position
+    #  can help to disambiguate the same name in another position.)
+    #-----------------------------------------------
+    tokens = find_proper_names(tokens)
+
+    #-----------------------------------------------
+    # Collate lemmas
+    #-----------------------------------------------
+    lemma_collection = LemmaCollection(tokens)
+    lemma_collection.add_counts_to_tokens(tokens)
+
+    return tokens, lemma_collection
+
+
+def stream_tokenizer(paragraphs, year):
+    """
+    Streaming version of tokenizer(): consume an iterable of paragraphs
+    (e.g. a generator reading a book-length file), yielding the list of
+    tokens for each paragraph in turn.
+
+    Proper names are resolved paragraph by paragraph. Forms resolved in
+    earlier paragraphs are carried forward (as sets of forms, rather
+    than tokens), so later paragraphs benefit from them; but unlike
+    tokenizer(), a later paragraph can't help to disambiguate an
+    earlier one. Lemmas are not collated (see StreamingTextManager).
+    """
+    context = AnalysisContext(year)
+    common_forms = set()
+    proper_forms = set()
+    for paragraph in paragraphs:
+        tokens = _lemmatize_text(paragraph, context)
+        yield find_proper_names(tokens, common_forms, proper_forms)
+
+
+def _lemmatize_text(text, context, workers=0):
+    """
+    Return a flat list of the text's tokens, with lemmas identified.
+
+    Lines that have already been lemmatized (for the same document year
+    and lexicon version) are restored from the line cache, rather than
+    tokenized and looked up again; so a lightly-edited resubmission
+    only costs as much as the lines that have changed. (The steps that
+    depend on the whole document - proper names and lemma collation -
+    are left to the caller, as before.)
+
+    If workers > 0 and there are at least PARALLEL_MIN_LINES lines to be
+    lemmatized, they're divided up between that many worker processes
+    (see analysispool.py).
+    """
+    year = context.year
+    if not LINE_CACHE_SIZE and not workers:
+        return _flatten(_lemmatize_lines(split_text(text, year), context))
+
+    if LINE_CACHE_SIZE:
+        version = lexicon_version()
+    lines = []
+    missing = {}
+    for i, line in enumerate(text.split('\n')):
+        if not line.strip():
+            continue
+        # Each line is tokenized (and keyed) along with the newline
+        #  preceding it, since the tokenizers treat the start of the
+        #  text differently
+        if i:
+            line = '\n' + line
+        if LINE_CACHE_SIZE:
+            key = (hashlib.sha1(line.encode('utf8')).digest(), year, version)
+            snapshot = _line_cache.get(key)
+        else:
+            key = snapshot = None
+        if snapshot is None:
+            missing[len(lines)] = (key, line)
+            lines.append(None)
+        else:
+            lines.append(_restore_line(snapshot, context))
+
+    # Lemmatize the lines which weren't cached, all in one go
+    if missing:
+        missing_lines = [line for key, line in missing.values()]
+        if workers and len(missing_lines) >= PARALLEL_MIN_LINES:
+            snapshots = map_chunks(_snapshot_lines, missing_lines, year,
+                                   workers=workers)
+            lemmatized = [_restore_line(snapshot, context)
+                          for snapshot in snapshots]
+        else:
+            lemmatized = _lemmatize_lines(_split_lines(missing_lines, year),
+                                          context)
+            snapshots = [_snapshot_line(sentences)
+                         for sentences in lemmatized]
+        for (i, (key, line)), sentences, snapshot in zip(
+                missing.items(), lemmatized, snapshots):
+            if key is not None:
+                _line_cache.set(key, snapshot)
+            lines[i] = sentences
+
+    return _flatten(lines)
+
+
+def _split_lines(lines, year):
+    # (split_text() returns an empty list for a line which has no
+    #  tokens)
+    split_lines = [split_text(line, year) for line in lines]
+    return [l[0] if l else [] for l in split_lines]
+
+
+def _snapshot_lines(lines, year):
+    """
+    Lemmatize lines of text, returning a snapshot of each line (this is
+    what gets run in the worker processes - see _lemmatize_text())
+    """
+    lemmatized = _lemmatize_lines(_split_lines(lines, year),
+                                  AnalysisContext(year))
+    return [_snapshot_line(sentences) for sentences in lemmatized]
+
+
+def _snapshot_line(sentences):
+    return tuple((sentence[0].sentence, tuple(t.state() for t in sentence))
+                 for sentence in sentences if sentence)
+
+
+def _restore_line(snapshot, context):
+    lemmatized = []
+    for sentence, states in snapshot:
+        tokens = [Token.restore(state, sentence, context)
+                  for state in states]
+        TokenTable(tokens)
+        lemmatized.append(tokens)
+    return lemmatized
+
+
+def _lemmatize_lines(lines, context):
+    """
+    Turn the output of split_text() into tokens, and identify the
+    lemmas. Returns a list of lines, each a list of sentences, each a
+    list of tokens.
+    """
+    lines_sentences = []
+    for sentences in lines:
+        lines_sentences.append([[Token(w, sentence, context) for w in words]
+                                for sentence, words in sentences])
+
+    #-----------------------------------------------
+    # Fetch the wordforms that will be needed for every token in the
+    #  document, in one go (rather than looking them up token by token)
+    #-----------------------------------------------
+    context.prefetched = _prefetch_wordforms(lines_sentences)
+
+    #-----------------------------------------------
+    # Lemmatization: identify lemmas for each token (where possible)
+    #-----------------------------------------------
+    return [[_identify_lemmas(sentence_tokens)
+             for sentence_tokens in sentences]
+            for sentences in lines_sentences]
+
+
+def _flatten(lines):
+    """
+    Concatenate the tokens of all the lines, marking the first token
+    of each line
+    """
+    tokens = []
+    for sentences in lines:
+        line_tokens = [t for sentence_tokens in sentences
+                       for t in sentence_tokens]
+        if line_tokens:
+            line_tokens[0].newline = True
+        tokens.extend(line_tokens)
+    return tokens
+
+
+def split_text(text, year):
+    """
+    Split the text into lines, each line into sentences, and each
+    sentence into words.
 
-def tokenizer(text, year):
-    Token.set_year(year)
+    Returns a list of lines, each a list of (sentence, words) pairs.
+    Uses the NLTK tokenizers or the single-pass regex tokenizer (see
+    regextokenizer.py), depending on the TOKENIZER_BACKEND setting.
+    """
+    if TOKENIZER_BACKEND == 'regex':
+        return regex_split_text(text, year)
+    else:
+        return nltk_split_text(text, year)
 
+
+def nltk_split_text(text, year):
+    """
+    Version of split_text() using the NLTK sentence and word tokenizers
+    """
     #-----------------------------------------------
     # Clean-up and lineation
     #-----------------------------------------------
@@ -40,49 +263,31 @@ def tokenizer(text, year):
     lines = [stop_masker(l) for l in lines]
 
     #-----------------------------------------------
-    # Tokenization and lemmatization
+    # Tokenization
     #-----------------------------------------------
-    tokens = []
+    lines_sentences = []
     for line in lines:
-        sentences = sent_tokenize(line)
-        line_tokens = []
-        for sentence in sentences:
+        sentences = []
+        for sentence in sent_tokenize(line):
             sentence = stop_unmasker(sentence)
             # Tokenize this sentence
             sentence = re.sub(r'([:,])$', r' \1', sentence)
-            sentence_tokens = [Token(w, sentence) for w in
-                               word_tokenize(sentence)]
-            # Identify lemmas for each token (where possible)
-            sentence_tokens = _identify_lemmas(sentence_tokens)
+            sentences.append((sentence, word_tokenize(sentence)))
+        lines_sentences.append(sentences)
+    return lines_sentences
 
-            # Add tokens from this sentence to line_tokens
-            line_tokens.extend(sentence_tokens)
-        if line_tokens:
-            line_tokens[0].newline = True
-        tokens.extend(line_tokens)
-
-    #-----------------------------------------------
-    # Figure out which tokens are proper names
-    #
-    # (We do this *after* concatenating all the tokens together,
-    #  rather than doing it sentence by sentence,
-    #  so that we can take advantage of information across the
-    #  whole text. For example, an unambiguous proper name in one position
-    #  can help to disambiguate the same name in another position.)
-    #-----------------------------------------------
-    tokens = _find_proper_names(tokens)
-
-    #-----------------------------------------------
-    # Collate lemmas
-    #-----------------------------------------------
-    lemma_collection = LemmaCollection(tokens)
-    lemma_collection.add_counts_to_tokens(tokens)
 
-    return tokens, lemma_collection
+def _prefetch_wordforms(lines_sentences):
+    keys = set()
+    for sentences in lines_sentences:
+        for sentence_tokens in sentences:
+            for token in sentence_tokens:
+                keys.update(token.lookup_keys())
+    return prefetch_wordforms(keys)
 
 
 def _identify_lemmas(tokens):
-    tokens = _mark_token_positions(tokens)
+    table = TokenTable(tokens)
 
     #-----------------------------------------------
     # Repair overzealous tokenization;
@@ -91,7 +296,7 @@ def _identify_lemmas(tokens):
 
     for token in tokens:
         token.repair_tokenization_errors()
-    tokens = _drop_discarded_tokens(tokens)
+    tokens = table.commit()
 
     #-----------------------------------------------
     # Find lemmas
@@ -107,12 +312,12 @@ def _identify_lemmas(tokens):
     for token in tokens:
         check_for_hyphen_5gram(token)
         check_for_hyphen_trigram(token)
-    tokens = _drop_discarded_tokens(tokens)
+    tokens = table.commit()
 
     for token in tokens:
         check_for_open_trigram(token)
         check_for_open_bigram(token)
-    tokens = _drop_discarded_tokens(tokens)
+    tokens = table.commit()
 
     #------------------------------------------------
     # Outstanding pos-checking for compounds
@@ -130,64 +335,4 @@ def _identify_lemmas(tokens):
     return tokens
 
 
-def _drop_discarded_tokens(tokens):
-    tokens = [t for t in tokens if not t.skip]
-    tokens = _mark_token_positions(tokens)
-    return tokens
-
-
-def _mark_token_positions(tokens):
-    # Mark the first and last tokens in the sentence
-    if tokens:
-        tokens[0].first = True
-        tokens[-1].last = True
-    # Make each token aware of its previous and following
-    #  neighbours
-    for i, token in enumerate(tokens):
-        try:
-            token.previous = tokens[i - 1]
-        except IndexError:
-            token.previous = None
-        try:
-            token.next = tokens[i + 1]
-        except IndexError:
-            token.next = None
-    return tokens
-
-
-def _find_proper_names(tokens):
-    for token in tokens:
-        token.check_proper_name(method='capitalization')
-
-    # Tag words which match other words that have already been tagged
-    common = set([t.lower() for t in tokens if t.proper_name is False])
-    for token in [t for t in tokens if t.proper_name is None
-                  and t.lower() in common]:
-        token.proper_name = False
-    # Tag names which match other names that have already been tagged
-    proper = set([t.token_verbatim for t in tokens if t.proper_name is True])
-    for token in [t for t in tokens if t.proper_name is None
-                  and t.token_verbatim in proper]:
-        token.proper_name = True
-
-    for token in tokens:
-        token.check_proper_name(method='neighbours')
-    for token in tokens:
-        token.check_proper_name(method='unambiguous')
-        token.check_proper_name(method='midsentence')
-
-    # Tag names which match other names that have already been tagged
-    proper = set([t.token_verbatim for t in tokens if t.proper_name is True])
-    for token in [t for t in tokens if t.proper_name is None
-                  and t.token_verbatim in proper]:
-        token.proper_name = True
-
-    for token in tokens:
-        token.check_proper_name(method='firstword')
-
-    # Remove any lemma reference from tokens which have been identified as
-    #  proper names
-    for token in [t for t in tokens if t.proper_name is True]:
-        token.nix_lemma()
-        token.token = token.token_verbatim
-    return tokens
+register_reload_hook(_line_cache.clear)
@@ -0,0 +1,36 @@
+"""
+Management command for profiling a book-length text file, using
+streaming analysis (see tm/lib/streamingtextmanager.py)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tm.lib.streamingtextmanager import (StreamingTextManager,
+                                              iterate_paragraphs)
+
+
+class Command(BaseCommand):
+    args = '<filepath> <year>'
+    help = 'Print profile statistics for a (long) text file'
+
+    def handle(self, *args, **options):
+        try:
+            filepath, year = args[0], int(args[1])
+        except (IndexError, ValueError):
+            raise CommandError('Usage: tmprofile %s' % self.args)
+
+        stm = StreamingTextManager(year)
+        with open(filepath) as filehandle:
+            for i, tokens in enumerate(stm.analyse(
+                    iterate_paragraphs(filehandle))):
+                # Trace progress message
+                if i and i % 100 == 0:
+                    self.stdout.write('%d paragraphs...' % i)
+
+        self.stdout.write('%d tokens, %d words, %d lemmas' % (
+            stm.num_tokens(), stm.num_words(), len(stm.lemmas)))
+        # (The statistics are all ratios per word)
+        if not stm.num_words():
+            raise CommandError('No words found in %s' % filepath)
+        for key, value in sorted(stm.profile_stats().items()):
+            self.stdout.write('\t%s\t%f' % (key, value))
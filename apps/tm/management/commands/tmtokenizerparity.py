@@ -0,0 +1,14 @@
+"""
+Management wrapper for checking the regex tokenizer against the NLTK
+tokenizer (see tm/build/test/tokenizerparity.py)
+"""
+
+from django.core.management.base import BaseCommand
+from apps.tm.build.test.tokenizerparity import tokenizer_parity
+
+
+class Command(BaseCommand):
+    help = 'Compare the regex and NLTK tokenizers over the canned texts'
+
+    def handle(self, *args, **options):
+        tokenizer_parity()
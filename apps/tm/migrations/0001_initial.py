@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'Language'
+        db.create_table('tm_language', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('name', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=40)),
+            ('family', self.gf('django.db.models.fields.related.ForeignKey')(null=True, to=orm['tm.Language'])),
+        ))
+        db.send_create_signal('tm', ['Language'])
+
+        # Adding model 'Definition'
+        db.create_table('tm_definition', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('text', self.gf('django.db.models.fields.CharField')(max_length=100)),
+        ))
+        db.send_create_signal('tm', ['Definition'])
+
+        # Adding model 'ThesaurusClass'
+        db.create_table('tm_thesaurusclass', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('label', self.gf('django.db.models.fields.CharField')(max_length=200, null=True)),
+            ('wordclass', self.gf('django.db.models.fields.CharField')(max_length=20, null=True)),
+            ('level', self.gf('django.db.models.fields.IntegerField')()),
+            ('parent', self.gf('django.db.models.fields.related.ForeignKey')(null=True, to=orm['tm.ThesaurusClass'])),
+            ('node_size', self.gf('django.db.models.fields.IntegerField')()),
+            ('branch_size', self.gf('django.db.models.fields.IntegerField')()),
+        ))
+        db.send_create_signal('tm', ['ThesaurusClass'])
+
+        # Adding model 'ThesaurusInstance'
+        db.create_table('tm_thesaurusinstance', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('lemma', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=100)),
+            ('refentry', self.gf('django.db.models.fields.IntegerField')(db_index=True)),
+            ('refid', self.gf('django.db.models.fields.IntegerField')(db_index=True)),
+            ('start_year', self.gf('django.db.models.fields.IntegerField')()),
+            ('end_year', self.gf('django.db.models.fields.IntegerField')()),
+            ('inflections', self.gf('django.db.models.fields.CharField')(max_length=100, null=True)),
+            ('thesclass', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['tm.ThesaurusClass'])),
+        ))
+        db.send_create_signal('tm', ['ThesaurusInstance'])
+
+        # Adding model 'Lemma'
+        db.create_table('tm_lemma', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('lemma', self.gf('django.db.models.fields.CharField')(max_length=40)),
+            ('sort', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=40)),
+            ('wordclass', self.gf('django.db.models.fields.CharField')(max_length=10, null=True)),
+            ('firstyear', self.gf('django.db.models.fields.IntegerField')(null=True)),
+            ('lastyear', self.gf('django.db.models.fields.IntegerField')(null=True)),
+            ('refentry', self.gf('django.db.models.fields.IntegerField')()),
+            ('refid', self.gf('django.db.models.fields.IntegerField')(null=True)),
+            ('language', self.gf('django.db.models.fields.related.ForeignKey')(null=True, to=orm['tm.Language'])),
+            ('definition', self.gf('django.db.models.fields.related.ForeignKey')(null=True, to=orm['tm.Definition'])),
+            ('thesaurus', self.gf('django.db.models.fields.related.ForeignKey')(null=True, to=orm['tm.ThesaurusClass'])),
+            ('f2000', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('f1950', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('f1900', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('f1850', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('f1800', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('f1750', self.gf('django.db.models.fields.FloatField')(null=True)),
+        ))
+        db.send_create_signal('tm', ['Lemma'])
+
+        # Adding model 'Wordform'
+        db.create_table('tm_wordform', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('wordform', self.gf('django.db.models.fields.CharField')(max_length=40)),
+            ('sort', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=40)),
+            ('wordclass', self.gf('django.db.models.fields.CharField')(max_length=10, null=True)),
+            ('lemma', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['tm.Lemma'])),
+            ('f2000', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('f1900', self.gf('django.db.models.fields.FloatField')(null=True)),
+            ('f1800', self.gf('django.db.models.fields.FloatField')(null=True)),
+        ))
+        db.send_create_signal('tm', ['Wordform'])
+
+        # Adding model 'ProperName'
+        db.create_table('tm_propername', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('lemma', self.gf('django.db.models.fields.CharField')(max_length=40)),
+            ('sort', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=40)),
+            ('common', self.gf('django.db.models.fields.BooleanField')()),
+        ))
+        db.send_create_signal('tm', ['ProperName'])
+
+        # Adding model 'Document'
+        db.create_table('tm_document', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('author', self.gf('django.db.models.fields.CharField')(max_length=40)),
+            ('authorsort', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=20)),
+            ('title', self.gf('django.db.models.fields.CharField')(max_length=50)),
+            ('titlesort', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=50)),
+            ('year', self.gf('django.db.models.fields.IntegerField')()),
+            ('text', self.gf('django.db.models.fields.TextField')()),
+            ('lemmas', self.gf('django.db.models.fields.TextField')()),
+            ('tokens', self.gf('django.db.models.fields.TextField')()),
+            ('teaser', self.gf('django.db.models.fields.CharField')(max_length=50)),
+            ('randomsort', self.gf('django.db.models.fields.IntegerField')(db_index=True)),
+        ))
+        db.send_create_signal('tm', ['Document'])
+
+        # Adding model 'UserSubmission'
+        db.create_table('tm_usersubmission', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('identifier', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=6)),
+            ('author', self.gf('django.db.models.fields.CharField')(max_length=40, null=True)),
+            ('title', self.gf('django.db.models.fields.CharField')(max_length=50)),
+            ('year', self.gf('django.db.models.fields.IntegerField')()),
+            ('text', self.gf('django.db.models.fields.TextField')()),
+            ('datestamp', self.gf('django.db.models.fields.DateTimeField')(auto_now_add=True, blank=True)),
+        ))
+        db.send_create_signal('tm', ['UserSubmission'])
+
+
+    def backwards(self, orm):
+        # Deleting model 'UserSubmission'
+        db.delete_table('tm_usersubmission')
+
+        # Deleting model 'Document'
+        db.delete_table('tm_document')
+
+        # Deleting model 'ProperName'
+        db.delete_table('tm_propername')
+
+        # Deleting model 'Wordform'
+        db.delete_table('tm_wordform')
+
+        # Deleting model 'Lemma'
+        db.delete_table('tm_lemma')
+
+        # Deleting model 'ThesaurusInstance'
+        db.delete_table('tm_thesaurusinstance')
+
+        # Deleting model 'ThesaurusClass'
+        db.delete_table('tm_thesaurusclass')
+
+        # Deleting model 'Definition'
+        db.delete_table('tm_definition')
+
+        # Deleting model 'Language'
+        db.delete_table('tm_language')
+
+
+    models = {
+        'tm.definition': {
+            'Meta': {'object_name': 'Definition'},
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'text': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        'tm.document': {
+            'Meta': {'object_name': 'Document', 'ordering': "['authorsort', 'titlesort']"},
+            'author': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            'authorsort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '20'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lemmas': ('django.db.models.fields.TextField', [], {}),
+            'randomsort': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'teaser': ('django.db.models.fields.CharField', [], {'max_length': '50'}),
+            'text': ('django.db.models.fields.TextField', [], {}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '50'}),
+            'titlesort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '50'}),
+            'tokens': ('django.db.models.fields.TextField', [], {}),
+            'year': ('django.db.models.fields.IntegerField', [], {})
+        },
+        'tm.language': {
+            'Meta': {'object_name': 'Language'},
+            'family': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.Language']"}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'})
+        },
+        'tm.lemma': {
+            'Meta': {'object_name': 'Lemma', 'ordering': "['sort']"},
+            'definition': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.Definition']"}),
+            'f1750': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1800': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1850': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1900': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1950': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f2000': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'firstyear': ('django.db.models.fields.IntegerField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'language': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.Language']"}),
+            'lastyear': ('django.db.models.fields.IntegerField', [], {'null': 'True'}),
+            'lemma': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            'refentry': ('django.db.models.fields.IntegerField', [], {}),
+            'refid': ('django.db.models.fields.IntegerField', [], {'null': 'True'}),
+            'sort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'}),
+            'thesaurus': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.ThesaurusClass']"}),
+            'wordclass': ('django.db.models.fields.CharField', [], {'max_length': '10', 'null': 'True'})
+        },
+        'tm.propername': {
+            'Meta': {'object_name': 'ProperName'},
+            'common': ('django.db.models.fields.BooleanField', [], {}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lemma': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            'sort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'})
+        },
+        'tm.thesaurusclass': {
+            'Meta': {'object_name': 'ThesaurusClass'},
+            'branch_size': ('django.db.models.fields.IntegerField', [], {}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'label': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True'}),
+            'level': ('django.db.models.fields.IntegerField', [], {}),
+            'node_size': ('django.db.models.fields.IntegerField', [], {}),
+            'parent': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.ThesaurusClass']"}),
+            'wordclass': ('django.db.models.fields.CharField', [], {'max_length': '20', 'null': 'True'})
+        },
+        'tm.thesaurusinstance': {
+            'Meta': {'object_name': 'ThesaurusInstance', 'ordering': "['start_year']"},
+            'end_year': ('django.db.models.fields.IntegerField', [], {}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'inflections': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'lemma': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '100'}),
+            'refentry': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'refid': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'start_year': ('django.db.models.fields.IntegerField', [], {}),
+            'thesclass': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['tm.ThesaurusClass']"})
+        },
+        'tm.usersubmission': {
+            'Meta': {'object_name': 'UserSubmission'},
+            'author': ('django.db.models.fields.CharField', [], {'max_length': '40', 'null': 'True'}),
+            'datestamp': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'identifier': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '6'}),
+            'text': ('django.db.models.fields.TextField', [], {}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '50'}),
+            'year': ('django.db.models.fields.IntegerField', [], {})
+        },
+        'tm.wordform': {
+            'Meta': {'object_name': 'Wordform', 'ordering': "['-f2000']"},
+            'f1800': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1900': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f2000': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lemma': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['tm.Lemma']"}),
+            'sort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'}),
+            'wordclass': ('django.db.models.fields.CharField', [], {'max_length': '10', 'null': 'True'}),
+            'wordform': ('django.db.models.fields.CharField', [], {'max_length': '40'})
+        },
+    }
+
+    complete_apps = ['tm']
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding field 'UserSubmission.lemmas'
+        db.add_column('tm_usersubmission', 'lemmas',
+                      self.gf('django.db.models.fields.TextField')(null=True),
+                      keep_default=False)
+
+        # Adding field 'UserSubmission.tokens'
+        db.add_column('tm_usersubmission', 'tokens',
+                      self.gf('django.db.models.fields.TextField')(null=True),
+                      keep_default=False)
+
+        # Adding field 'UserSubmission.lexicon_version'
+        db.add_column('tm_usersubmission', 'lexicon_version',
+                      self.gf('django.db.models.fields.IntegerField')(null=True),
+                      keep_default=False)
+
+
+    def backwards(self, orm):
+        # Deleting field 'UserSubmission.lemmas'
+        db.delete_column('tm_usersubmission', 'lemmas')
+
+        # Deleting field 'UserSubmission.tokens'
+        db.delete_column('tm_usersubmission', 'tokens')
+
+        # Deleting field 'UserSubmission.lexicon_version'
+        db.delete_column('tm_usersubmission', 'lexicon_version')
+
+
+    models = {
+        'tm.alternatekey': {
+            'Meta': {'object_name': 'AlternateKey'},
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'target': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            'variant': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'})
+        },
+        'tm.definition': {
+            'Meta': {'object_name': 'Definition'},
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'text': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        'tm.document': {
+            'Meta': {'object_name': 'Document', 'ordering': "['authorsort', 'titlesort']"},
+            'author': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            'authorsort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '20'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lemmas': ('django.db.models.fields.TextField', [], {}),
+            'randomsort': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'teaser': ('django.db.models.fields.CharField', [], {'max_length': '50'}),
+            'text': ('django.db.models.fields.TextField', [], {}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '50'}),
+            'titlesort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '50'}),
+            'tokens': ('django.db.models.fields.TextField', [], {}),
+            'year': ('django.db.models.fields.IntegerField', [], {})
+        },
+        'tm.language': {
+            'Meta': {'object_name': 'Language'},
+            'family': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.Language']"}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'})
+        },
+        'tm.lemma': {
+            'Meta': {'object_name': 'Lemma', 'ordering': "['sort']"},
+            'definition': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.Definition']"}),
+            'f1750': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1800': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1850': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1900': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1950': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f2000': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'firstyear': ('django.db.models.fields.IntegerField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'language': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.Language']"}),
+            'lastyear': ('django.db.models.fields.IntegerField', [], {'null': 'True'}),
+            'lemma': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            'refentry': ('django.db.models.fields.IntegerField', [], {}),
+            'refid': ('django.db.models.fields.IntegerField', [], {'null': 'True'}),
+            'sort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'}),
+            'thesaurus': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.ThesaurusClass']"}),
+            'wordclass': ('django.db.models.fields.CharField', [], {'max_length': '10', 'null': 'True'})
+        },
+        'tm.lexiconbuild': {
+            'Meta': {'object_name': 'LexiconBuild'},
+            'datestamp': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'})
+        },
+        'tm.propername': {
+            'Meta': {'object_name': 'ProperName'},
+            'common': ('django.db.models.fields.BooleanField', [], {}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lemma': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            'sort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'})
+        },
+        'tm.thesaurusclass': {
+            'Meta': {'object_name': 'ThesaurusClass'},
+            'branch_size': ('django.db.models.fields.IntegerField', [], {}),
+            'breadcrumb_text': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'label': ('django.db.models.fields.CharField', [], {'max_length': '200', 'null': 'True'}),
+            'level': ('django.db.models.fields.IntegerField', [], {}),
+            'node_size': ('django.db.models.fields.IntegerField', [], {}),
+            'parent': ('django.db.models.fields.related.ForeignKey', [], {'null': 'True', 'to': "orm['tm.ThesaurusClass']"}),
+            'path': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '200', 'null': 'True'}),
+            'wordclass': ('django.db.models.fields.CharField', [], {'max_length': '20', 'null': 'True'})
+        },
+        'tm.thesaurusinstance': {
+            'Meta': {'object_name': 'ThesaurusInstance', 'ordering': "['start_year']"},
+            'end_year': ('django.db.models.fields.IntegerField', [], {}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'inflections': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'lemma': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '100'}),
+            'refentry': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'refid': ('django.db.models.fields.IntegerField', [], {'db_index': 'True'}),
+            'start_year': ('django.db.models.fields.IntegerField', [], {}),
+            'thesclass': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['tm.ThesaurusClass']"})
+        },
+        'tm.usersubmission': {
+            'Meta': {'object_name': 'UserSubmission'},
+            'author': ('django.db.models.fields.CharField', [], {'max_length': '40', 'null': 'True'}),
+            'datestamp': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'identifier': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '6'}),
+            'lemmas': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'lexicon_version': ('django.db.models.fields.IntegerField', [], {'null': 'True'}),
+            'text': ('django.db.models.fields.TextField', [], {}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '50'}),
+            'tokens': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'year': ('django.db.models.fields.IntegerField', [], {})
+        },
+        'tm.wordform': {
+            'Meta': {'object_name': 'Wordform', 'ordering': "['-f2000']"},
+            'f1800': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f1900': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'f2000': ('django.db.models.fields.FloatField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'lemma': ('django.db.models.fields.related.ForeignKey', [], {'to': "orm['tm.Lemma']"}),
+            'sort': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '40'}),
+            'wordclass': ('django.db.models.fields.CharField', [], {'max_length': '10', 'null': 'True'}),
+            'wordform': ('django.db.models.fields.CharField', [], {'max_length': '40'})
+        },
+    }
+
+    complete_apps = ['tm']
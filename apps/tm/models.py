@@ -24,27 +24,14 @@ class Definition(models.Model):
     text = models.CharField(max_length=100)
 
 
-class Lemma(models.Model):
+class LemmaBase(object):
 
-    lemma = models.CharField(max_length=40)
-    sort = models.CharField(max_length=40, db_index=True)
-    wordclass = models.CharField(max_length=10, null=True)
-    firstyear = models.IntegerField(null=True)
-    lastyear = models.IntegerField(null=True)
-    refentry = models.IntegerField()
-    refid = models.IntegerField(null=True)
-    language = models.ForeignKey('Language', null=True)
-    definition = models.ForeignKey('Definition', null=True)
-    thesaurus = models.ForeignKey('ThesaurusClass', null=True)
-    f2000 = models.FloatField(null=True)
-    f1950 = models.FloatField(null=True)
-    f1900 = models.FloatField(null=True)
-    f1850 = models.FloatField(null=True)
-    f1800 = models.FloatField(null=True)
-    f1750 = models.FloatField(null=True)
+    """
+    Methods shared by the Lemma model and by the lightweight lemma
+    records held in the in-process lexicon index (see lib/lexiconindex.py)
+    """
 
-    class Meta:
-        ordering = ['sort', ]
+    __slots__ = ()
 
     def __unicode__(self):
         if self.refid:
@@ -61,35 +48,45 @@ class Lemma(models.Model):
     def url(self):
         return URL_TEMPLATE % self.oed_identifier()
 
+    def language_record(self):
+        """
+        Return the lemma's language, from the in-memory copy of the
+        Language table (rather than following the foreign key, which
+        would mean a query per lemma)
+        """
+        from .lib.lexiconindex import language_table
+        return language_table().get(self.language_id)
+
     def language_name(self):
-        if self.language is None:
+        language = self.language_record()
+        if language is None:
             return None
         else:
-            return self.language.name
+            return language.name
 
     def language_family(self):
-        if self.language is None or self.language.family is None:
+        language = self.language_record()
+        if language is None or language.family is None:
             return None
         else:
-            return self.language.family.name
-
-    def token_count(self):
-        try:
-            return self.count
-        except AttributeError:
-            return 1
+            return language.family.name
 
     def has_definition(self):
         """
         Return 1 or 0, depending on whether the lemma does or does
         not have a definition stored in the database 
         """
-        if self.definition:
+        if self.definition_id:
             return 1
         else:
             return 0
 
-    def to_list(self):
+    def to_list(self, count=1):
+        """
+        Return the list of values sent to the client; count is the
+        number of tokens of the lemma in the document (see
+        LemmaCollection.token_count())
+        """
         def abbreviate_language(language):
             if language in LANGUAGE_ABBREVIATIONS:
                 return LANGUAGE_ABBREVIATIONS[language]
@@ -121,7 +118,7 @@ class Lemma(models.Model):
                 self.firstyear,
                 abbreviate_language(self.language_name() or 'undefined'),
                 abbreviate_language(self.language_family() or 'undefined'),
-                self.token_count(),
+                count,
                 int(self.definition_id or 0),
                 theslink(self.lemma, self.thesaurus_id),
                 self.f1750,
@@ -132,6 +129,29 @@ class Lemma(models.Model):
                 self.f2000]
 
 
+class Lemma(LemmaBase, models.Model):
+
+    lemma = models.CharField(max_length=40)
+    sort = models.CharField(max_length=40, db_index=True)
+    wordclass = models.CharField(max_length=10, null=True)
+    firstyear = models.IntegerField(null=True)
+    lastyear = models.IntegerField(null=True)
+    refentry = models.IntegerField()
+    refid = models.IntegerField(null=True)
+    language = models.ForeignKey('Language', null=True)
+    definition = models.ForeignKey('Definition', null=True)
+    thesaurus = models.ForeignKey('ThesaurusClass', null=True)
+    f2000 = models.FloatField(null=True)
+    f1950 = models.FloatField(null=True)
+    f1900 = models.FloatField(null=True)
+    f1850 = models.FloatField(null=True)
+    f1800 = models.FloatField(null=True)
+    f1750 = models.FloatField(null=True)
+
+    class Meta:
+        ordering = ['sort', ]
+
+
 class Wordform(models.Model):
 
     wordform = models.CharField(max_length=40)
@@ -154,6 +174,30 @@ class Wordform(models.Model):
             return '<Wordform: %s/%s>' % (self.wordform, self.wordclass)
 
 
+class LexiconBuild(models.Model):
+
+    """
+    Records each time the lexicon tables (and the files derived from
+    them) are rebuilt; see record_lexicon_build() in build/pipeline.py.
+    The ID of the latest build serves as a version number for anything
+    derived from the lexicon tables.
+    """
+
+    datestamp = models.DateTimeField(auto_now_add=True)
+
+
+class AlternateKey(models.Model):
+
+    """
+    Maps a variant sort (e.g. 'walketh') to the sort of a known wordform
+    that one of the lemma_lookup() fallback rewrites may convert it to
+    (e.g. 'walks'). Built by build/lexicon/alternateindexer.py.
+    """
+
+    variant = models.CharField(max_length=40, db_index=True)
+    target = models.CharField(max_length=40)
+
+
 class ProperName(models.Model):
 
     lemma = models.CharField(max_length=40)
@@ -200,6 +244,12 @@ class UserSubmission(models.Model):
     year = models.IntegerField()
     text = models.TextField()
     datestamp = models.DateTimeField(auto_now_add=True)
+    # Results of the analysis (as for Document), and the version of the
+    #  lexicon they were computed against (see lexicon_version()); these
+    #  are recomputed when the lexicon changes - see storeusersubmission.py
+    lemmas = models.TextField(null=True)
+    tokens = models.TextField(null=True)
+    lexicon_version = models.IntegerField(null=True)
 
     def get_absolute_url(self):
         return reverse('tm:display_stored',
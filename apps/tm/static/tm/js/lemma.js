@@ -1,4 +1,4 @@
-/* global $, d3, document_year */
+/* global $, d3, document_year, definition_url, lexicon_version, max_definition_batch */
 'use strict';
 
 var expansions = {F: 'French', L: 'Latin', G: 'Germanic', R: 'Romance',
@@ -43,13 +43,48 @@ function definitionAjaxCall(lemma) {
 	$.ajax({
 		type: 'GET',
 		dataType: 'json',
-		url: definition_url + lemma.definitionid,
+		url: definitionUrl([lemma.definitionid]),
 		success: function(data) { lemma.definition = data[0]},
 		fail: function(data) { lemma.definition = '[Definition not found]'},
 		async: false
 	});
 }
 
+// URL for a batch of definitions. The lexicon version is included so that
+//  the response can be cached indefinitely.
+function definitionUrl(definition_ids) {
+	return definition_url + definition_ids.join() + '?v=' + lexicon_version;
+}
+
+// Fetch the definitions for all the lemmas in the list that have one
+//  (asynchronously, in batches), so that they're already available when
+//  a lemma's details are displayed.
+function prefetchDefinitions(lemmas) {
+	var batch_size = max_definition_batch;
+	var pending = lemmas.filter(function(lemma) {
+		return lemma.definitionid > 0 && !lemma.definition;
+	});
+	for (var i = 0; i < pending.length; i += batch_size) {
+		definitionBatchAjaxCall(pending.slice(i, i + batch_size));
+	}
+}
+
+function definitionBatchAjaxCall(lemmas) {
+	var ids = lemmas.map(function(lemma) { return lemma.definitionid; });
+	$.ajax({
+		type: 'GET',
+		dataType: 'json',
+		url: definitionUrl(ids),
+		success: function(data) {
+			for (var i = 0; i < lemmas.length; i += 1) {
+				if (!lemmas[i].definition) {
+					lemmas[i].definition = data[i];
+				}
+			}
+		}
+	});
+}
+
 Lemma.prototype.linesplitDefinition = function() {
 	var definition = this.getDefinition();
 	if (definition) {
@@ -1,4 +1,4 @@
-/*global $, d3, lemmajson, tokenjson, document_year */
+/*global $, d3, lemmajson, tokenjson, results_url, document_year */
 'use strict';
 
 // Global variables
@@ -27,18 +27,12 @@ var lemma_details,
 	thesaurus_animation,
 	thesaurus_slider;
 
-// Expand token and lemma rows from compressed arrays to more legible objects 
-var tokendata = uncompressTokenData(tokenjson);
-var lemmadata = uncompressLemmaData(lemmajson);
-
-// We make a shallow copy of lemmadata so that this can be re-sorted in the lemma
-//  table. (We don't want to do this with the original version of lemmadata,
-//  since this needs to be kept in its original order - other functions reference
-//  lemmas by index position.)
-var lemmadata_sortable = lemmadata.slice();
-
-// Information that will be used when the thesaurus is animated
-var thesaurusdata = initializeThesaurusData();
+// Token and lemma data, expanded from compressed arrays to more legible
+//  objects (see loadResults())
+var tokendata,
+	lemmadata,
+	lemmadata_sortable,
+	thesaurusdata;
 var thesaurusdata_loaded = false;
 
 
@@ -47,7 +41,10 @@ var thesaurusdata_loaded = false;
 //===============================================================
 
 $(document).ready( function() {
+	loadResults(initializePage);
+});
 
+function initializePage() {
 	lemma_details = $('#lemmaDetails');
 	thesaurus_details = $('#thesaurusDetails');
 	growth_details = $('#growthDetails');
@@ -67,6 +64,11 @@ $(document).ready( function() {
 	initializeLemmaTable();
 	showUrlModal();
 
+	// Fetch definitions in bulk now, rather than one by one later
+	if (prefetch_definitions) {
+		prefetchDefinitions(lemmadata);
+	}
+
 	// Set listeners for pop-up close buttons
 	lemma_details.find('.lemmaDetailsCloser').click( function() {
 		lemma_details.css('display', 'none');
@@ -77,7 +79,7 @@ $(document).ready( function() {
 	// Set listeners for popovers on buttons and links
 	$('button[data-toggle="popover"]').popover({trigger: 'hover', placement: 'top'});
 	$('a[data-toggle="popover"]').popover({trigger: 'hover', placement: 'top'});
-});
+}
 
 
 function showUrlModal() {
@@ -94,6 +96,75 @@ function showUrlModal() {
 // Data preparation
 //===============================================================
 
+// Set up tokendata and lemmadata, either from the columnar results
+//  payload (fetched from results_url), or from the rows included in the
+//  page itself; then run the callback
+function loadResults(callback) {
+	if (results_url) {
+		$.getJSON(results_url, {}, function(json) {
+			var rows = uncompressResults(json);
+			setResults(rows.tokens, rows.lemmas);
+			callback();
+		}).fail(function() {
+			$('#continuousText').html('<div class="alert alert-error">' +
+				'Sorry, the results for this document could not be loaded. ' +
+				'Please try reloading the page.</div>');
+		});
+	} else {
+		setResults(tokenjson, lemmajson);
+		callback();
+	}
+}
+
+function setResults(token_rows, lemma_rows) {
+	tokendata = uncompressTokenData(token_rows);
+	lemmadata = uncompressLemmaData(lemma_rows);
+
+	// We make a shallow copy of lemmadata so that this can be re-sorted in the lemma
+	//  table. (We don't want to do this with the original version of lemmadata,
+	//  since this needs to be kept in its original order - other functions reference
+	//  lemmas by index position.)
+	lemmadata_sortable = lemmadata.slice();
+
+	// Information that will be used when the thesaurus is animated
+	thesaurusdata = initializeThesaurusData();
+}
+
+// Turn the columnar results payload (see tm/lib/resultspayload.py) back
+//  into token and lemma rows
+function uncompressResults(json) {
+	var tokens = json.tokens;
+	var lemmas = json.lemmas;
+	var i, row;
+	var token_rows = [];
+	for (i = 0; i < tokens.text.length; i += 1) {
+		row = [tokens.text[i], decodeColumn(tokens.status, i), tokens.space[i]];
+		if (tokens.lemma[i] >= 0) {
+			row.push(tokens.lemma[i]);
+			row.push(decodeColumn(tokens.wordclass, i));
+		}
+		token_rows.push(row);
+	}
+
+	var lemma_rows = [];
+	for (i = 0; i < lemmas.id.length; i += 1) {
+		row = [lemmas.id[i], lemmas.url[i], lemmas.lemma[i], lemmas.sort[i],
+			lemmas.year[i], decodeColumn(lemmas.language, i),
+			decodeColumn(lemmas.family, i), lemmas.count[i],
+			lemmas.definition[i], lemmas.thesaurus[i]];
+		for (var j = 0; j < lemmas.frequency.length; j += 1) {
+			row.push(lemmas.frequency[j][i]);
+		}
+		lemma_rows.push(row);
+	}
+	return {tokens: token_rows, lemmas: lemma_rows};
+}
+
+// Value of a dictionary-encoded column at position i
+function decodeColumn(column, i) {
+	return column.values[column.codes[i]];
+}
+
 function uncompressLemmaData(compressed) {
 	var expanded = [];
 	for (var i = 0; i < compressed.length; i += 1) {
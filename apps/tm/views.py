@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse, HttpResponseRedirect, Http404
+from django.http import HttpResponseRedirect, HttpResponseBadRequest, Http404
+from django.core.urlresolvers import reverse
 
 from wordrobot.sitetools.usertools import group_required
 
@@ -21,18 +22,31 @@ def display_canned(request, **kwargs):
     """
     from .models import Document
     from .lib.scatterbuttons import scatter_buttons
+    from .lib.lexiconindex import lexicon_version
+    from .lib.appsettings import PREFETCH_DEFINITIONS, MAX_DEFINITION_BATCH
     author = kwargs.get('author')
     title = kwargs.get('title')
     try:
-        record = Document.objects.get(authorsort=author, titlesort=title)
+        # The results themselves are fetched separately by the page (see
+        #  results_data()), so there's no need to load them here
+        record = Document.objects.defer('lemmas', 'tokens').get(
+            authorsort=author, titlesort=title)
     except Document.DoesNotExist:
         raise Http404()
     else:
+        # The lexicon version is included in the URL of the results, so
+        #  that a browser doesn't reuse results cached before the lexicon
+        #  was rebuilt (which would have out-of-date definition IDs)
+        version = lexicon_version()
+        results_url = reverse('tm:canned_data', kwargs={
+            'author': author, 'title': title})
         params = {'text': record.text, 'author': record.author,
                   'title': record.title, 'document_year': record.year,
                   'scatter_buttons': scatter_buttons(record.year),
-                  'jsonlemmas': record.lemmas,
-                  'jsontokens': record.tokens,
+                  'results_url': '%s?v=%d' % (results_url, version),
+                  'lexicon_version': version,
+                  'prefetch_definitions': PREFETCH_DEFINITIONS,
+                  'max_definition_batch': MAX_DEFINITION_BATCH,
                   'include_save': False}
     return render(request, 'tm/viewresults.html', params)
 
@@ -41,27 +55,78 @@ def display_stored(request, **kwargs):
     """
     Display results for a stored user-submitted document
     """
-    from .lib.textmanager import TextManager
     from .models import UserSubmission
     from .lib.scatterbuttons import scatter_buttons
+    from .lib.lexiconindex import lexicon_version
+    from .lib.appsettings import PREFETCH_DEFINITIONS, MAX_DEFINITION_BATCH
     identifier = kwargs.get('identifier')
     try:
-        record = UserSubmission.objects.get(identifier=identifier)
+        record = UserSubmission.objects.defer('lemmas', 'tokens').get(
+            identifier=identifier)
     except UserSubmission.DoesNotExist:
         raise Http404()
     else:
-        tc = TextManager(record.text, record.year)
-        json_lemmas = tc.lemmas_datastruct(formalism='json')
-        json_tokens = tc.tokens_datastruct(formalism='json')
+        # (Lexicon version included in the URL - see display_canned())
+        version = lexicon_version()
+        results_url = reverse('tm:stored_data', kwargs={
+            'identifier': identifier})
         params = {'text': record.text, 'author': record.author,
                   'title': record.title, 'document_year': record.year,
                   'scatter_buttons': scatter_buttons(record.year),
-                  'jsonlemmas': json_lemmas,
-                  'jsontokens': json_tokens,
+                  'results_url': '%s?v=%d' % (results_url, version),
+                  'lexicon_version': version,
+                  'prefetch_definitions': PREFETCH_DEFINITIONS,
+                  'max_definition_batch': MAX_DEFINITION_BATCH,
                   'include_save': False}
     return render(request, 'tm/viewresults.html', params)
 
 
+def results_data(request, **kwargs):
+    """
+    Return the results (lemmas and tokens) for a canned document or a
+    stored user-submitted document, as a columnar JSON payload
+    (gzipped, if the client accepts it) - in response to AJAX requests
+    from the results page
+
+    The request URL includes the lexicon version (the 'v' parameter), so
+    that results cached by the browser are not reused after the lexicon
+    has been rebuilt; see display_canned().
+    """
+    import json
+    import hashlib
+    from .models import Document, UserSubmission
+    from .lib.storeusersubmission import stored_results
+    from .lib.httpcaching import cacheable_response
+    from .lib.resultspayload import columnar_payload
+    if kwargs.get('identifier'):
+        try:
+            record = UserSubmission.objects.get(
+                identifier=kwargs.get('identifier'))
+        except UserSubmission.DoesNotExist:
+            raise Http404()
+        # (Recomputed here if the lexicon has changed since they were
+        #  stored)
+        json_lemmas, json_tokens = stored_results(record)
+    else:
+        try:
+            record = Document.objects.only('lemmas', 'tokens').get(
+                authorsort=kwargs.get('author'),
+                titlesort=kwargs.get('title'))
+        except Document.DoesNotExist:
+            raise Http404()
+        json_lemmas = record.lemmas
+        json_tokens = record.tokens
+
+    # The ETag is a hash of the row-based results, so the columnar
+    #  payload only gets built if the client doesn't already have it
+    etag = hashlib.sha1((json_lemmas + json_tokens).encode('utf8')).hexdigest()
+    content = lambda: columnar_payload(json.loads(json_lemmas),
+                                       json.loads(json_tokens))
+    return cacheable_response(request, content,
+                              content_type='application/json',
+                              etag=etag, compress=True)
+
+
 @group_required('text_metrics_viewer')
 def list_canned(request):
     """
@@ -100,6 +165,8 @@ def submit(request):
     from .lib.submissioncleaner import submission_cleaner
     from .lib.textmanager import TextManager
     from .lib.scatterbuttons import scatter_buttons
+    from .lib.lexiconindex import lexicon_version
+    from .lib.appsettings import PREFETCH_DEFINITIONS, MAX_DEFINITION_BATCH
     if request.method == 'POST':
         post = submission_cleaner(request.POST.copy())
         tc = TextManager(post['text'], post['year'])
@@ -110,6 +177,9 @@ def submit(request):
                   'scatter_buttons': scatter_buttons(post['year']),
                   'jsonlemmas': json_lemmas,
                   'jsontokens': json_tokens,
+                  'lexicon_version': lexicon_version(),
+                  'prefetch_definitions': PREFETCH_DEFINITIONS,
+                  'max_definition_batch': MAX_DEFINITION_BATCH,
                   'include_save': True}
         return render(request, 'tm/viewresults.html', params)
     else:
@@ -132,18 +202,38 @@ def save_text(request):
 
 def fetch_definition(request, **kwargs):
     """
-    Return the definition text from a given row in the Definition table
+    Return the definition text from one or more rows in the Definition
+    table, as a list in the same order as the (comma-separated) IDs
     (in response to AJAX requests)
+
+    If the request includes the lexicon version (as the 'v' parameter),
+    and this is the current version (checked against the database, in
+    case the lexicon has been rebuilt since this process loaded it), the
+    response is marked as immutable, since the definitions for a given
+    version never change.
+
+    Requests for more than MAX_DEFINITION_BATCH IDs are rejected (the
+    results page splits its requests into batches of this size).
     """
     import json
     from .models import Definition
-    definition_id = int(kwargs.get('id'))
-    try:
-        definition = Definition.objects.get(id=definition_id).text
-    except Definition.DoesNotExist:
-        definition = '[definition not found]'
-    response = json.dumps([definition, ])
-    return HttpResponse(response, content_type='text/plain')
+    from .lib.httpcaching import cacheable_response
+    from .lib.lexiconindex import lexicon_version
+    from .lib.appsettings import MAX_DEFINITION_BATCH
+    definition_ids = [int(z) for z in kwargs.get('idstring').split(',')
+                      if z]
+    if len(definition_ids) > MAX_DEFINITION_BATCH:
+        return HttpResponseBadRequest('Too many definition IDs (maximum %d)'
+                                      % MAX_DEFINITION_BATCH)
+    definitions = Definition.objects.in_bulk(definition_ids)
+    response = json.dumps([definitions[definition_id].text
+                           if definition_id in definitions
+                           else '[definition not found]'
+                           for definition_id in definition_ids])
+    immutable = ('v' in request.GET and
+                 request.GET['v'] == str(lexicon_version(check=True)))
+    return cacheable_response(request, response, content_type='text/plain',
+                              immutable=immutable)
 
 
 def fetch_thesaurus_alternatives(request, **kwargs):
@@ -152,18 +242,11 @@ def fetch_thesaurus_alternatives(request, **kwargs):
     (in response to AJAX requests)
     """
     import json
-    from .htmodels import ThesaurusClass
-    class_ids = [int(z) for z in kwargs.get('idstring').split(',')]
-    records = []
-    for class_id in class_ids:
-        try:
-            record = ThesaurusClass.objects.get(id=class_id)
-        except ThesaurusClass.DoesNotExist:
-            pass
-        else:
-            records.append(record.to_dict())
-    response = json.dumps(records)
-    return HttpResponse(response, content_type='text/plain')
+    from .lib.thesauruslookup import thesaurus_records
+    from .lib.httpcaching import cacheable_response
+    class_ids = [int(z) for z in kwargs.get('idstring').split(',') if z]
+    response = json.dumps(thesaurus_records(class_ids))
+    return cacheable_response(request, response, content_type='text/plain')
 
 
 def info(request, **kwargs):
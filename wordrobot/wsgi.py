@@ -12,3 +12,11 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wordrobot.settings")
 
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+# Load the lexicon filter now, rather than on the first request. (The
+#  core-word table and the gazetteer are loaded from the database, so are
+#  left until first needed in each worker: a connection opened here would
+#  be shared by every worker forked from this process, and a database
+#  outage would stop the application from starting.)
+from apps.tm.lib.lexiconfilter import lexicon_filter
+lexicon_filter()